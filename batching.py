@@ -0,0 +1,141 @@
+"""
+Micro-batching for slow remote calls: requests arriving within a short window
+are coalesced into one call, and each caller gets its own result back.
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Tuple
+
+# Marks where each text starts in a joined batch, e.g. "[[3]]"; translators leave it alone
+BATCH_MARKER = re.compile(r'\[\[\s*(\d+)\s*\]\]')
+
+
+def join_numbered(texts: List[str]) -> Optional[str]:
+    """
+    Join texts into one string, each after its own numbered marker.
+    Returns None when a text already contains something that looks like a marker,
+    since the result couldn't be split back safely.
+    """
+    if any(BATCH_MARKER.search(text) for text in texts):
+        return None
+    return '\n'.join(f'[[{index}]]\n{text}' for index, text in enumerate(texts))
+
+
+def split_numbered(joined: str, count: int) -> Optional[List[str]]:
+    """
+    Undo join_numbered() on a processed (e.g. translated) string.
+    Returns None unless exactly markers 0..count-1 come back, in order.
+    """
+    parts = BATCH_MARKER.split(joined)
+    indices = parts[1::2]
+    if parts[0].strip() or indices != [str(index) for index in range(count)]:
+        return None
+    return [part.strip() for part in parts[2::2]]
+
+
+def process_joined(function: Callable[[str], str], texts: List[str],
+                   max_chars: Optional[int] = None) -> Tuple[List[str], int]:
+    """
+    Apply a text-to-text call (e.g. a translator) to many texts: one call on the
+    join_numbered() text when it fits in max_chars and splits back afterwards,
+    otherwise one call per text.
+    Returns: (one result per text, number of calls made)
+    """
+    joined = join_numbered(texts) if len(texts) > 1 else None
+    if joined is not None and (max_chars is None or len(joined) <= max_chars):
+        results = split_numbered(function(joined), len(texts))
+        if results is not None:
+            return results, 1
+        return [function(text) for text in texts], len(texts) + 1
+    return [function(text) for text in texts], len(texts)
+
+
+class MicroBatcher:
+    """
+    Coalesces submit() calls into batches: a batch is handed to handler(items)
+    once max_size items are waiting or window seconds after its first item,
+    whichever comes first. With max_concurrent, at most that many batches run
+    at once; items arriving meanwhile keep collecting and go out as soon as a
+    batch finishes, so batches grow by themselves under load.
+    With key, only items with equal key(item) share a batch (e.g. the same source language).
+    handler returns one result per item, in order; if it raises, every caller
+    in the batch gets the exception. A caller that stops waiting (cancelled or
+    timed out) doesn't stop its batch.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]],
+                 window: float, max_size: int, max_concurrent: Optional[int] = None,
+                 key: Optional[Callable[[Any], Hashable]] = None):
+        self.handler = handler
+        self.window = window
+        self.max_size = max(1, max_size)
+        self.max_concurrent = max_concurrent
+        self.key = key
+        self.waiting: List[Tuple[Any, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # Waiting items are due but every batch slot is busy
+        self.overdue = False
+        self.running = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.max_concurrent is not None and self.running >= self.max_concurrent
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.waiting.append((item, future))
+        if self._has_full_batch(item):
+            self.flush()
+        elif self.timer is None and not self.overdue:
+            self.timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Hand waiting items to the handler, max_size at a time, while a batch slot is free."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        loop = asyncio.get_running_loop()
+        while self.waiting and not self.saturated:
+            self.running += 1
+            loop.create_task(self._run(self._next_batch()))
+        self.overdue = bool(self.waiting)
+
+    def _has_full_batch(self, item: Any) -> bool:
+        if self.key is None:
+            return len(self.waiting) >= self.max_size
+        key = self.key(item)
+        return sum(1 for waiting, _ in self.waiting if self.key(waiting) == key) >= self.max_size
+
+    def _next_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Take up to max_size waiting items: the oldest one and, with key, others sharing its key."""
+        if self.key is None:
+            batch, self.waiting = self.waiting[:self.max_size], self.waiting[self.max_size:]
+            return batch
+        key = self.key(self.waiting[0][0])
+        batch, rest = [], []
+        for entry in self.waiting:
+            (batch if len(batch) < self.max_size and self.key(entry[0]) == key else rest).append(entry)
+        self.waiting = rest
+        return batch
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.running -= 1
+            if self.overdue or (self.waiting and self._has_full_batch(self.waiting[0][0])):
+                self.flush()
@@ -0,0 +1,917 @@
+# benchmark.py - Detection Benchmark Suite
+#
+# Generates a labeled corpus from slur_patterns.json and PatternDetector.substitutions,
+# then measures throughput, latency and accuracy of the detector.
+#
+#   python benchmark.py                              # both engines, 2000 messages
+#   python benchmark.py --engine automaton -o run.json
+#   python benchmark.py --baseline run.json          # compare against an earlier run
+#   python benchmark.py --translation                # translation batching vs a stub translator
+#   python benchmark.py --gemini                     # pooled vs per-call HTTP sessions vs a stub server
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter_ns, sleep
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from batching import MicroBatcher, process_joined
+from pattern_detector import ENGINES, DetectorPool, PatternDetector
+
+SLURS_FILE = "slur_patterns.json"
+
+CORPUS_KINDS = ("clean", "leetspeak", "spaced", "homoglyph", "separator_heavy", "typo")
+
+CLEAN_MESSAGES = [
+    "hello there how are you",
+    "lol that game was great",
+    "anyone up for ranked tonight",
+    "i love pasta and pizza",
+    "the weather is nice today",
+    "check out this meme",
+    "gg wp everyone",
+    "what time is the meeting",
+    "my cat is sleeping on the keyboard",
+    "ok see you later",
+    "Thanks for the help!",
+    "can someone send the link again",
+    "brb getting food",
+    "that boss fight took me forever",
+    "did you see the new update",
+    "happy birthday!! 🎉",
+    "we should play again tomorrow",
+    "who's hosting the stream",
+    "my internet is so slow today",
+    "nice shot, clean win",
+]
+
+SEPARATORS = [" ", ".", "-", "_", " . ", "..", " - "]
+
+# Slowest check_text call allowed, as a multiple of the scan budget: the deadline
+# is checked between patterns, and a scan past it is finished by the automaton
+BUDGET_OVERRUN_LIMIT = 2.0
+
+
+class Sample(NamedTuple):
+    kind: str
+    text: str
+    word: Optional[str]  # base word hidden in the message, None for clean text
+
+
+def load_words(path: str = SLURS_FILE) -> List[str]:
+    with open(path, 'r') as f:
+        data = json.load(f)
+    words = []
+    for category, value in data.items():
+        if not category.startswith('_'):
+            if isinstance(value, dict) and 'words' in value:
+                words.extend([w for w in value['words'] if not w.startswith('_')])
+            elif isinstance(value, list):
+                words.extend([w for w in value if not w.startswith('_')])
+    return list(dict.fromkeys(words))
+
+
+def load_word_lists(path: str = SLURS_FILE) -> Dict[str, List[str]]:
+    """Per-category word lists as bot.parse_slur_file reads them"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    word_lists = {}
+    for category, value in data.items():
+        if not category.startswith('_'):
+            if isinstance(value, dict) and 'words' in value:
+                word_lists[category] = [w for w in value['words'] if not w.startswith('_')]
+            elif isinstance(value, list):
+                word_lists[category] = [w for w in value if not w.startswith('_')]
+    return word_lists
+
+
+def load_categories(path: str = SLURS_FILE) -> Dict[str, dict]:
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {
+        category: value for category, value in data.items()
+        if not category.startswith('_') and isinstance(value, dict) and 'words' in value
+    }
+
+
+def generate_corpus(words: List[str], substitutions: Dict[str, List[str]],
+                    count: int = 2000, seed: int = 42) -> List[Sample]:
+    """
+    Build a labeled corpus, cycling through CORPUS_KINDS.
+    Every non-clean message hides exactly one base word between clean chat text.
+    """
+    rng = random.Random(seed)
+    leet = {
+        letter: [v for v in variants if v.isascii() and not v.isalpha()]
+        for letter, variants in substitutions.items()
+    }
+    homoglyphs = {
+        letter: [v for v in variants if len(v) == 1 and not v.isascii()]
+        for letter, variants in substitutions.items()
+    }
+
+    def swap(word: str, table: Dict[str, List[str]]) -> str:
+        chars = []
+        for char in word:
+            options = table.get(char)
+            chars.append(rng.choice(options) if options and rng.random() < 0.6 else char)
+        return ''.join(chars)
+
+    def typo(word: str) -> str:
+        position = rng.randrange(len(word) - 1)
+        edit = rng.choice(("insert", "delete", "substitute", "transpose"))
+        if edit == "insert":
+            return word[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[position:]
+        if edit == "delete":
+            return word[:position] + word[position + 1:]
+        if edit == "substitute":
+            return word[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz".replace(word[position], "")) + word[position + 1:]
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+    long_words = [word for word in words if len(word) >= 5] or words
+
+    def disguise(kind: str, word: str) -> str:
+        if kind == "typo":
+            return typo(word)
+        if kind == "leetspeak":
+            return swap(word, leet)
+        if kind == "spaced":
+            return rng.choice(SEPARATORS[:4]).join(word)
+        if kind == "homoglyph":
+            return swap(word, homoglyphs)
+        # separator_heavy: long message with separator runs inside and around the word
+        padding = ' '.join(rng.choice(["...", "---", "_ _ _", ". . ."]) for _ in range(rng.randint(40, 120)))
+        return f"{padding} {rng.choice(SEPARATORS[4:]).join(word)} {padding}"
+
+    corpus = []
+    for index in range(count):
+        kind = CORPUS_KINDS[index % len(CORPUS_KINDS)]
+        before = rng.choice(CLEAN_MESSAGES)
+        after = rng.choice(CLEAN_MESSAGES)
+        if kind == "clean":
+            corpus.append(Sample(kind, f"{before}. {after}", None))
+            continue
+        word = rng.choice(long_words if kind == "typo" else words)
+        corpus.append(Sample(kind, f"{before} {disguise(kind, word)} {after}", word))
+    return corpus
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def time_calls(function: Callable[[str], object], corpus: List[Sample]) -> Dict[str, float]:
+    """Call function once per message and summarize the per-call latency"""
+    timings = []
+    for sample in corpus:
+        started = perf_counter_ns()
+        function(sample.text)
+        timings.append(perf_counter_ns() - started)
+
+    timings.sort()
+    total_seconds = sum(timings) / 1e9
+    return {
+        "messages": len(timings),
+        "msgs_per_sec": round(len(timings) / total_seconds, 1) if total_seconds else None,
+        "p50_us": round(percentile(timings, 0.50) / 1000, 2),
+        "p99_us": round(percentile(timings, 0.99) / 1000, 2),
+        "max_us": round(timings[-1] / 1000, 2),
+    }
+
+
+def time_batch(check_many: Callable[[Iterable[str]], Iterable[object]], corpus: List[Sample]) -> Dict[str, float]:
+    """Throughput of a check_many over the whole corpus (no per-message latency in a batch)"""
+    started = perf_counter_ns()
+    for _ in check_many(sample.text for sample in corpus):
+        pass
+    total_seconds = (perf_counter_ns() - started) / 1e9
+    return {
+        "messages": len(corpus),
+        "msgs_per_sec": round(len(corpus) / total_seconds, 1) if total_seconds else None,
+        "mean_us": round(total_seconds * 1e6 / len(corpus), 2) if corpus else None,
+    }
+
+
+def measure_accuracy(detector: PatternDetector, words: List[str], corpus: List[Sample],
+                     substrings: bool = False) -> Dict[str, object]:
+    """
+    Recall: share of disguised messages where the hidden base word is reported.
+    False positives: clean messages with any hit.
+    """
+    by_kind = {kind: {"total": 0, "detected": 0} for kind in CORPUS_KINDS if kind != "clean"}
+    clean_total = 0
+    false_positives = []
+
+    for sample in corpus:
+        hits = detector.find_hits(sample.text, words, substrings=substrings)
+        if sample.word is None:
+            clean_total += 1
+            if hits:
+                false_positives.append({"text": sample.text, "matched": sorted({hit.text for hit in hits})})
+            continue
+        by_kind[sample.kind]["total"] += 1
+        if any(hit.word == sample.word for hit in hits):
+            by_kind[sample.kind]["detected"] += 1
+
+    for counts in by_kind.values():
+        counts["recall"] = round(counts["detected"] / counts["total"], 4) if counts["total"] else None
+
+    total = sum(counts["total"] for counts in by_kind.values())
+    detected = sum(counts["detected"] for counts in by_kind.values())
+    return {
+        "recall": round(detected / total, 4) if total else None,
+        "by_kind": by_kind,
+        "false_positives": len(false_positives),
+        "false_positive_rate": round(len(false_positives) / clean_total, 4) if clean_total else None,
+        "false_positive_examples": false_positives[:10],
+    }
+
+
+# Substrings that only an entry dropped by compile_word_list spells out literally
+PRUNED_SUBSTRINGS = ["aj3wb", "xk y sx", "atowel headb"]
+
+
+def check_pruning_parity(engine: str, words: List[str], word_lists: Dict[str, List[str]],
+                         categories: Dict[str, dict], corpus: List[Sample]) -> Dict[str, object]:
+    """
+    Scan the corpus with the full word list and with the list the bot builds
+    (build_word_list_matcher), with and without substrings, and count texts
+    where the two disagree on being flagged or on the categories hit.
+    """
+    full = PatternDetector(engine)
+    full.compile_patterns(words)
+    full.set_categories(categories)
+    pruned = PatternDetector(engine)
+    pruned_words = list(pruned.install_matcher(pruned.build_word_list_matcher(word_lists)).source)
+    pruned.set_categories(categories)
+
+    texts = [sample.text for sample in corpus] + PRUNED_SUBSTRINGS
+    parity = {"entries": len(words), "kept": len(pruned_words)}
+    for name, substrings in (("check_text", False), ("contains_slur", True)):
+        mismatches = []
+        for text in texts:
+            expected = sorted({hit.category for hit in full.find_hits(text, words, substrings)})
+            actual = sorted({hit.category for hit in pruned.find_hits(text, pruned_words, substrings)})
+            if expected != actual:
+                mismatches.append({"text": text, "full": expected, "pruned": actual})
+        parity[name] = {"mismatches": len(mismatches), "examples": mismatches[:10]}
+    return parity
+
+
+def check_prefilter_recall(engine: str, words: List[str], categories: Dict[str, dict],
+                           corpus: List[Sample]) -> Dict[str, object]:
+    """
+    Scan the corpus with and without the prefilter and count texts where the
+    prefilter made hits go missing. No time budget, so a timeout can't make the runs differ.
+    """
+    detector = PatternDetector(engine)
+    detector.compile_patterns(words)
+    detector.set_categories(categories)
+
+    lost = []
+    for sample in corpus:
+        detector.use_prefilter = True
+        filtered = {(hit.word, hit.start, hit.end, hit.variant) for hit in detector.find_hits(sample.text, words, substrings=True)}
+        detector.use_prefilter = False
+        unfiltered = {(hit.word, hit.start, hit.end, hit.variant) for hit in detector.find_hits(sample.text, words, substrings=True)}
+        if unfiltered - filtered:
+            lost.append({"text": sample.text, "lost": sorted({hit[0] for hit in unfiltered - filtered})})
+    return {
+        "texts": len(corpus),
+        "skipped": detector.matcher.prefilter.misses,
+        "lost": len(lost),
+        "examples": lost[:10],
+    }
+
+
+def check_budget(stats: Dict[str, float], budget_ms: int) -> Dict[str, object]:
+    """Whether the slowest call of a time_calls() run stayed within BUDGET_OVERRUN_LIMIT of the budget"""
+    limit_ms = budget_ms * BUDGET_OVERRUN_LIMIT if budget_ms else None
+    max_ms = round(stats["max_us"] / 1000, 2)
+    return {
+        "budget_ms": budget_ms,
+        "limit_ms": limit_ms,
+        "max_ms": max_ms,
+        "within": limit_ms is None or max_ms <= limit_ms,
+    }
+
+
+def load_contains_slur(detector: PatternDetector, words: List[str]) -> Optional[Callable[[str], object]]:
+    """bot.contains_slur wired to this detector, or None when bot.py can't be imported here"""
+    try:
+        import bot
+    except Exception as e:
+        # Missing dependencies, or bot.py failing at import (e.g. a command registered twice)
+        print(f"⚠️ Skipping contains_slur, bot.py didn't import: {type(e).__name__}: {e}")
+        return None
+    bot.detector = detector
+    bot.slur_patterns = words
+    loop = asyncio.new_event_loop()
+    return lambda text: loop.run_until_complete(bot.contains_slur(text))
+
+
+def time_pool(detector: PatternDetector, corpus: List[Sample], workers: int) -> Dict[str, float]:
+    pool = DetectorPool(detector, workers)
+    try:
+        pool.submit("warm up").result()
+        return time_batch(pool.check_many, corpus)
+    finally:
+        pool.shutdown()
+
+
+def run_engine(engine: str, words: List[str], word_lists: Dict[str, List[str]], categories: Dict[str, dict],
+               corpus: List[Sample], budget_ms: int, workers: List[int], fuzzy_distance: int) -> Dict[str, object]:
+    detector = PatternDetector(engine)
+    detector.time_budget = budget_ms / 1000 if budget_ms else None
+    detector.compile_patterns(words)
+    detector.set_categories(categories)
+
+    # Warm up caches so the first timed message doesn't pay for them
+    for sample in corpus[:20]:
+        detector.check_text(sample.text, words)
+
+    benchmarks = {
+        "check_text": time_calls(lambda text: detector.check_text(text, words), corpus),
+        "normalize_text": time_calls(detector.normalize_text, corpus),
+        "check_many": time_batch(lambda texts: detector.check_many(texts, words), corpus),
+    }
+    for count in workers:
+        benchmarks[f"pool_{count}_workers"] = time_pool(detector, corpus, count)
+    contains_slur = load_contains_slur(detector, words)
+    if contains_slur:
+        benchmarks["contains_slur"] = time_calls(contains_slur, corpus)
+
+    accuracy = {
+        "check_text": measure_accuracy(detector, words, corpus),
+        "contains_slur": measure_accuracy(detector, words, corpus, substrings=True),
+    }
+
+    exceptions_applied = detector.exceptions_applied
+
+    # Fuzzy tier measured on its own, with every category opted in
+    if fuzzy_distance:
+        detector.set_categories({
+            category: dict(data, fuzzy_distance=fuzzy_distance) for category, data in categories.items()
+        })
+        benchmarks["check_text_fuzzy"] = time_calls(lambda text: detector.check_text(text, words), corpus)
+        accuracy["check_text_fuzzy"] = measure_accuracy(detector, words, corpus)
+        detector.set_categories(categories)
+
+    return {
+        "benchmarks": benchmarks,
+        "accuracy": accuracy,
+        "prefilter": {"skipped": detector.matcher.prefilter.misses, "scanned": detector.matcher.prefilter.hits},
+        "budget_exceeded": detector.budget_exceeded,
+        "budget_check": check_budget(benchmarks["check_text"], budget_ms),
+        "exceptions_applied": exceptions_applied,
+        "pruning_parity": check_pruning_parity(engine, words, word_lists, categories, corpus),
+        "prefilter_recall": check_prefilter_recall(engine, words, categories, corpus),
+    }
+
+
+class StubTranslator:
+    """
+    Stands in for GoogleTranslator: waits like a round trip (a fixed latency plus a
+    little per character), then upper-cases the text, which leaves batch markers intact.
+    """
+
+    def __init__(self, latency_ms: float, per_char_ms: float = 0.02):
+        self.latency = latency_ms / 1000
+        self.per_char = per_char_ms / 1000
+        self.calls = 0
+
+    def translate(self, text: str) -> str:
+        self.calls += 1
+        sleep(self.latency + len(text) * self.per_char)
+        return text.upper()
+
+
+def time_translation(texts: List[str], rate: float, window_ms: int, batch_size: int,
+                     workers: int, latency_ms: float) -> Dict[str, float]:
+    """
+    Replay texts arriving at rate per second through the bot's translation path
+    (thread pool, plus a MicroBatcher when batch_size > 1) against a StubTranslator,
+    and measure per-message latency from arrival to result.
+    """
+    translator = StubTranslator(latency_ms)
+    timings = []
+
+    async def replay() -> float:
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        async def translate_batch(batch: List[str]) -> List[str]:
+            results, _ = await loop.run_in_executor(executor, process_joined, translator.translate, batch)
+            return results
+
+        batcher = MicroBatcher(translate_batch, window_ms / 1000, batch_size, workers) if batch_size > 1 else None
+
+        async def translate(text: str) -> None:
+            started = perf_counter_ns()
+            if batcher is not None:
+                await batcher.submit(text)
+            else:
+                await loop.run_in_executor(executor, translator.translate, text)
+            timings.append(perf_counter_ns() - started)
+
+        started = perf_counter_ns()
+        tasks = []
+        for text in texts:
+            tasks.append(loop.create_task(translate(text)))
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+        executor.shutdown()
+        return (perf_counter_ns() - started) / 1e9
+
+    total_seconds = asyncio.new_event_loop().run_until_complete(replay())
+    timings.sort()
+    return {
+        "messages": len(timings),
+        "window_ms": window_ms,
+        "batch_size": batch_size,
+        "translator_calls": translator.calls,
+        "msgs_per_sec": round(len(timings) / total_seconds, 1),
+        "p50_ms": round(percentile(timings, 0.50) / 1e6, 1),
+        "p95_ms": round(percentile(timings, 0.95) / 1e6, 1),
+        "max_ms": round(timings[-1] / 1e6, 1),
+    }
+
+
+def run_translation(corpus: List[Sample], rate: float, workers: int, latency_ms: float,
+                    batch_size: int) -> Dict[str, object]:
+    """Translation batching trade-off: no batching, then growing windows at one batch size"""
+    texts = [sample.text for sample in corpus]
+    runs = {"unbatched": time_translation(texts, rate, 0, 1, workers, latency_ms)}
+    for window_ms in (10, 25, 50, 100):
+        runs[f"window_{window_ms}ms"] = time_translation(texts, rate, window_ms, batch_size, workers, latency_ms)
+    return {"rate": rate, "workers": workers, "latency_ms": latency_ms, "runs": runs}
+
+
+def print_translation_report(results: Dict[str, object]) -> None:
+    print(f'\n{"="*60}')
+    print(f'🌐 Translation: {results["rate"]} msgs/sec arriving, {results["workers"]} threads, '
+          f'{results["latency_ms"]} ms stub round trip')
+    print(f'{"="*60}')
+    for name, stats in results["runs"].items():
+        print(f'   • {name}: {stats["translator_calls"]} calls for {stats["messages"]} messages, '
+              f'{stats["msgs_per_sec"]} msgs/sec, p50 {stats["p50_ms"]} ms, p95 {stats["p95_ms"]} ms')
+    print()
+
+
+STUB_PAYLOAD = {"contents": [{"parts": [{"text": "benchmark"}]}]}
+STUB_GEMINI_REPLY = {"candidates": [{"content": {"parts": [{"text": '{"is_harmful": false, "severity": 2, "reason": "stub", "context": "playful"}'}]}}]}
+
+
+async def start_gemini_stub(latency_ms: float, key_limit: int = 0, key_window: float = 1.0,
+                            slow_fraction: float = 0, slow_ms: float = 0, seed: int = 42):
+    """
+    Local HTTP server answering any POST like generateContent after latency_ms. Returns (runner, url).
+    With key_limit, each ?key= value gets that many requests per key_window seconds
+    and a 429 with Gemini's retryDelay beyond that.
+    slow_fraction of responses (picked at random) take slow_ms instead.
+    """
+    from aiohttp import web
+
+    counts: Dict[tuple, int] = {}
+    rng = random.Random(seed)
+
+    async def generate(request):
+        await request.read()
+        await asyncio.sleep((slow_ms if rng.random() < slow_fraction else latency_ms) / 1000)
+        if key_limit:
+            now = asyncio.get_running_loop().time()
+            window = (request.query.get("key"), int(now / key_window))
+            counts[window] = counts.get(window, 0) + 1
+            if counts[window] > key_limit:
+                retry_delay = round(key_window - now % key_window, 2)
+                return web.json_response({"error": {"code": 429, "details": [{"retryDelay": f"{retry_delay}s"}]}}, status=429)
+        return web.json_response(STUB_GEMINI_REPLY)
+
+    app = web.Application()
+    app.router.add_post("/{tail:.*}", generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/v1beta/models/stub:generateContent"
+
+
+async def time_gemini_calls(url: str, requests: int, concurrency: int, pooled: bool,
+                            max_connections: int) -> Dict[str, float]:
+    """
+    Make requests POSTs to url, concurrency at a time, either through one shared
+    gemini_client session (pooled) or a fresh session per call like the bot used to.
+    """
+    from gemini_client import RequestTimings, create_session
+
+    timings = RequestTimings(samples=requests)
+    payload = {"contents": [{"parts": [{"text": "benchmark"}]}]}
+    shared = create_session(max_connections, trace_configs=[timings.trace_config]) if pooled else None
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call() -> None:
+        async with slots:
+            if shared is not None:
+                async with shared.post(url, json=payload) as response:
+                    await response.json()
+            else:
+                async with create_session(max_connections, trace_configs=[timings.trace_config]) as session:
+                    async with session.post(url, json=payload) as response:
+                        await response.json()
+
+    started = perf_counter_ns()
+    try:
+        await asyncio.gather(*(call() for _ in range(requests)))
+    finally:
+        if shared is not None:
+            await shared.close()
+    total_seconds = (perf_counter_ns() - started) / 1e9
+    request_ms = sorted(timings.request_ms)
+    return {
+        **timings.summary(),
+        "calls_per_sec": round(requests / total_seconds, 1),
+        "p50_request_ms": round(request_ms[len(request_ms) // 2], 1) if request_ms else None,
+    }
+
+
+async def time_key_choice(url: str, checks: int, rate: float, keys: int, key_limit: int, key_window: float,
+                          scheduled: bool) -> Dict[str, float]:
+    """
+    Replay AI checks arriving at rate per second, each trying keys until one
+    answers: in fixed order from the last key that worked (the bot's old loop)
+    or the way call_gemini does it (gemini_client's scheduler, scheduled_attempts
+    and race). Measures per-check latency and requests sent.
+    """
+    from gemini_client import KeyScheduler, create_session, post_with_key, race, scheduled_attempts
+
+    names = [f"key{index}" for index in range(keys)]
+    # Like setting gemini_key_rpm to the stub's limit
+    scheduler = KeyScheduler(rpm=key_limit, minute=key_window)
+    last_working = [0]
+    stats = {"requests": 0, "rate_limited": 0, "failed": 0}
+    timings = []
+    session = create_session(max_connections=64)
+
+    async def attempt(index: int) -> Optional[int]:
+        stats["requests"] += 1
+        response = await post_with_key(session, url, names[index], STUB_PAYLOAD, scheduler if scheduled else None)
+        if response.status == 429:
+            stats["rate_limited"] += 1
+        return index if response.status == 200 else None
+
+    async def check() -> None:
+        started = perf_counter_ns()
+        if scheduled:
+            result = (await race(scheduled_attempts(scheduler, names, attempt))).result
+        else:
+            result = None
+            for offset in range(keys):
+                result = await attempt((last_working[0] + offset) % keys)
+                if result is not None:
+                    last_working[0] = result
+                    break
+        stats["failed"] += result is None
+        timings.append(perf_counter_ns() - started)
+
+    try:
+        tasks = []
+        for _ in range(checks):
+            tasks.append(asyncio.get_running_loop().create_task(check()))
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+    finally:
+        await session.close()
+    timings.sort()
+    return {
+        **stats,
+        "checks": checks,
+        "requests_per_check": round(stats["requests"] / checks, 2),
+        "p50_ms": round(percentile(timings, 0.50) / 1e6, 1),
+        "p99_ms": round(percentile(timings, 0.99) / 1e6, 1),
+    }
+
+
+async def time_hedging(url: str, checks: int, rate: float, keys: int, hedge: bool,
+                       hedge_percentile: float, budget_ratio: float, delay_ms: float) -> Dict[str, float]:
+    """
+    Replay AI checks arriving at rate per second the way call_gemini does
+    (scheduled_attempts and race over post_with_key): without hedging, or
+    hedging after gemini_client.hedge_delay() of the latencies seen so far.
+    """
+    from gemini_client import HedgeBudget, KeyScheduler, create_session, hedge_delay, post_with_key, race, scheduled_attempts
+
+    names = [f"key{index}" for index in range(keys)]
+    scheduler = KeyScheduler()
+    latencies = deque(maxlen=200)
+    budget = HedgeBudget(budget_ratio)
+    stats = {"requests": 0, "hedges": 0, "hedge_wins": 0, "failed": 0}
+    timings = []
+    session = create_session(max_connections=64)
+
+    async def attempt(index: int) -> Optional[int]:
+        stats["requests"] += 1
+        response = await post_with_key(session, url, names[index], STUB_PAYLOAD, scheduler)
+        if response.status != 200:
+            return None
+        latencies.append(response.latency_ms)
+        return index
+
+    async def check() -> None:
+        started = perf_counter_ns()
+        delay = hedge_delay(latencies, hedge_percentile, delay_ms / 1000) if hedge else None
+        outcome = await race(scheduled_attempts(scheduler, names, attempt), delay, budget if delay is not None else None)
+        timings.append(perf_counter_ns() - started)
+        stats["hedges"] += outcome.hedges
+        stats["hedge_wins"] += outcome.hedge_won
+        stats["failed"] += outcome.result is None
+
+    try:
+        tasks = []
+        for _ in range(checks):
+            tasks.append(asyncio.get_running_loop().create_task(check()))
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+    finally:
+        await session.close()
+    timings.sort()
+    return {
+        **stats,
+        "checks": checks,
+        "requests_per_check": round(stats["requests"] / checks, 2),
+        "p50_ms": round(percentile(timings, 0.50) / 1e6, 1),
+        "p99_ms": round(percentile(timings, 0.99) / 1e6, 1),
+    }
+
+
+def run_gemini(url: Optional[str], requests: int, concurrency: int, latency_ms: float,
+               max_connections: int, rate: float, keys: int, key_limit: int,
+               key_window: float, slow_fraction: float = 0, slow_ms: float = 0,
+               hedge_percentile: float = 95, hedge_budget: float = 0.1) -> Optional[Dict[str, object]]:
+    """
+    Per-call sessions vs one pooled session, against url or a local stub server.
+    With key_limit (stub only), also fixed key rotation vs KeyScheduler against
+    per-key rate limits. With slow_fraction (stub only), also unhedged vs hedged
+    calls against a stub where that share of responses takes slow_ms.
+    """
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError as e:
+        print(f"⚠️ Skipping Gemini session benchmark: {e}")
+        return None
+
+    async def run() -> Dict[str, object]:
+        runner, target = (None, url) if url else await start_gemini_stub(latency_ms)
+        try:
+            results = {
+                "url": target,
+                "requests": requests,
+                "concurrency": concurrency,
+                "stub_latency_ms": None if url else latency_ms,
+                "runs": {
+                    "session_per_call": await time_gemini_calls(target, requests, concurrency, False, max_connections),
+                    "pooled_session": await time_gemini_calls(target, requests, concurrency, True, max_connections),
+                },
+            }
+        finally:
+            if runner is not None:
+                await runner.cleanup()
+        if url:
+            return results
+
+        if key_limit:
+            results["key_choice"] = {"rate": rate, "keys": keys, "key_limit": key_limit, "key_window_s": key_window, "runs": {}}
+            for name, scheduled in (("fixed_rotation", False), ("scheduler", True)):
+                runner, target = await start_gemini_stub(latency_ms, key_limit, key_window)
+                try:
+                    results["key_choice"]["runs"][name] = await time_key_choice(
+                        target, requests, rate, keys, key_limit, key_window, scheduled
+                    )
+                finally:
+                    await runner.cleanup()
+
+        if slow_fraction:
+            results["hedging"] = {"rate": rate, "keys": keys, "slow_fraction": slow_fraction, "slow_ms": slow_ms,
+                                  "percentile": hedge_percentile, "budget": hedge_budget, "runs": {}}
+            for name, hedge in (("unhedged", False), ("hedged", True)):
+                # Same seed, so both runs see the same slow responses
+                runner, target = await start_gemini_stub(latency_ms, slow_fraction=slow_fraction, slow_ms=slow_ms)
+                try:
+                    results["hedging"]["runs"][name] = await time_hedging(
+                        target, requests, rate, keys, hedge, hedge_percentile, hedge_budget, 2000
+                    )
+                finally:
+                    await runner.cleanup()
+        return results
+
+    return asyncio.new_event_loop().run_until_complete(run())
+
+
+def print_gemini_report(results: Dict[str, object]) -> None:
+    print(f'\n{"="*60}')
+    print(f'🤖 Gemini HTTP: {results["requests"]} requests, {results["concurrency"]} at a time, {results["url"]}')
+    print(f'{"="*60}')
+    for name, stats in results["runs"].items():
+        print(f'   • {name}: {stats["connections_opened"]} connections opened, {stats["connections_reused"]} reused, '
+              f'handshake avg {stats["avg_connect_ms"]} ms, request avg {stats["avg_request_ms"]} ms, '
+              f'{stats["calls_per_sec"]} calls/sec')
+    key_choice = results.get("key_choice")
+    if key_choice:
+        print(f'\n🔑 Key choice: {key_choice["rate"]} checks/sec, {key_choice["keys"]} keys, '
+              f'{key_choice["key_limit"]} requests per key every {key_choice["key_window_s"]}s')
+        for name, stats in key_choice["runs"].items():
+            print(f'   • {name}: {stats["requests_per_check"]} requests per check, {stats["rate_limited"]} rate limited, '
+                  f'{stats["failed"]} failed, p50 {stats["p50_ms"]} ms, p99 {stats["p99_ms"]} ms')
+    hedging = results.get("hedging")
+    if hedging:
+        print(f'\n🏁 Hedging: {hedging["rate"]} checks/sec, {hedging["slow_fraction"]:.0%} of responses take '
+              f'{hedging["slow_ms"]} ms, hedge after p{hedging["percentile"]:g}, budget {hedging["budget"]:.0%}')
+        for name, stats in hedging["runs"].items():
+            print(f'   • {name}: {stats["requests_per_check"]} requests per check, {stats["hedges"]} hedges '
+                  f'({stats["hedge_wins"]} won), p50 {stats["p50_ms"]} ms, p99 {stats["p99_ms"]} ms')
+    print()
+
+
+def compare(results: Dict[str, object], baseline: Dict[str, object]) -> Dict[str, object]:
+    """Per-engine deltas (current - baseline) for throughput, latency and accuracy"""
+    comparison = {}
+    for engine, current in results["engines"].items():
+        previous = baseline.get("engines", {}).get(engine)
+        if not previous:
+            continue
+        deltas = {}
+        for name, stats in current["benchmarks"].items():
+            old = previous["benchmarks"].get(name)
+            if old:
+                deltas[name] = {
+                    key: round(stats[key] - old[key], 2)
+                    for key in ("msgs_per_sec", "p50_us", "p99_us")
+                    if stats.get(key) is not None and old.get(key) is not None
+                }
+        for name, stats in current["accuracy"].items():
+            old = previous["accuracy"].get(name)
+            if old:
+                deltas[f"{name}_accuracy"] = {
+                    "recall": round(stats["recall"] - old["recall"], 4),
+                    "false_positives": stats["false_positives"] - old["false_positives"],
+                }
+        comparison[engine] = deltas
+    return comparison
+
+
+def print_report(results: Dict[str, object]) -> None:
+    print(f'\n{"="*60}')
+    print(f'📊 Benchmark: {results["corpus"]["messages"]} messages, {results["words"]} words')
+    print(f'{"="*60}')
+    for engine, result in results["engines"].items():
+        print(f'\n⚙️ Engine: {engine}')
+        for name, stats in result["benchmarks"].items():
+            if "p50_us" in stats:
+                print(f'   • {name}: {stats["msgs_per_sec"]} msgs/sec, p50 {stats["p50_us"]} µs, p99 {stats["p99_us"]} µs')
+            else:
+                print(f'   • {name}: {stats["msgs_per_sec"]} msgs/sec, mean {stats["mean_us"]} µs')
+        for name, accuracy in result["accuracy"].items():
+            print(f'   • {name} recall: {accuracy["recall"]:.2%}, false positives: {accuracy["false_positives"]}')
+            for kind, counts in accuracy["by_kind"].items():
+                print(f'       - {kind}: {counts["detected"]}/{counts["total"]}')
+        budget = result["budget_check"]
+        if budget["limit_ms"] is not None:
+            status = "✅" if budget["within"] else "❌"
+            print(f'   • slowest check_text: {budget["max_ms"]} ms '
+                  f'(budget {budget["budget_ms"]} ms, limit {budget["limit_ms"]:g} ms) {status}')
+        recall = result["prefilter_recall"]
+        status = "✅" if not recall["lost"] else "❌"
+        print(f'   • prefilter: {recall["skipped"]}/{recall["texts"]} texts skipped, '
+              f'{recall["lost"]} lost hits compared to scanning every text {status}')
+        if recall["lost"]:
+            print(f'     ⚠️ Prefilter dropped hits, e.g. {recall["examples"][0]}')
+        parity = result["pruning_parity"]
+        print(f'   • pruned list ({parity["entries"]} → {parity["kept"]} entries): '
+              f'{parity["check_text"]["mismatches"]} mismatches, {parity["contains_slur"]["mismatches"]} with substrings')
+        for name in ("check_text", "contains_slur"):
+            if parity[name]["mismatches"]:
+                print(f'     ⚠️ Pruning changed {name} results, e.g. {parity[name]["examples"][0]}')
+
+    for engine, deltas in results.get("baseline_comparison", {}).items():
+        print(f'\n📈 {engine} vs baseline:')
+        for name, delta in deltas.items():
+            changes = ', '.join(f'{key} {value:+}' for key, value in delta.items())
+            print(f'   • {name}: {changes}')
+            if delta.get("recall", 0) < 0 or delta.get("false_positives", 0) > 0:
+                print('     ⚠️ Accuracy regression')
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PatternDetector throughput and accuracy")
+    parser.add_argument("--messages", type=int, default=2000, help="corpus size")
+    parser.add_argument("--seed", type=int, default=42, help="corpus random seed")
+    parser.add_argument("--engine", choices=ENGINES + ("all",), default="all")
+    parser.add_argument("--budget-ms", type=int, default=50, help="per-message scan budget like scan_time_budget_ms (0 = unlimited)")
+    parser.add_argument("--workers", type=int, nargs="*", default=[],
+                        help="also time DetectorPool.check_many with these worker counts, e.g. --workers 1 2 4")
+    parser.add_argument("--fuzzy-distance", type=int, choices=(0, 1, 2), default=1,
+                        help="edit distance for the separate fuzzy-tier run (0 = skip)")
+    parser.add_argument("--words", default=SLURS_FILE, help="word list JSON")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="where to write JSON results")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--translation", action="store_true",
+                        help="benchmark translation batching against a stub translator instead of the detector")
+    parser.add_argument("--rate", type=float, default=40, help="--translation: messages arriving per second")
+    parser.add_argument("--translation-workers", type=int, default=4, help="--translation: like translation_workers")
+    parser.add_argument("--translation-latency-ms", type=float, default=150,
+                        help="--translation: stub translator round trip")
+    parser.add_argument("--batch-size", type=int, default=8, help="--translation: like translation_batch_size")
+    parser.add_argument("--gemini", action="store_true",
+                        help="benchmark pooled vs per-call HTTP sessions for Gemini calls instead of the detector")
+    parser.add_argument("--gemini-url", help="--gemini: POST here instead of a local stub server (e.g. an HTTPS endpoint)")
+    parser.add_argument("--gemini-requests", type=int, default=200, help="--gemini: number of requests per run")
+    parser.add_argument("--gemini-concurrency", type=int, default=4, help="--gemini: requests in flight at once")
+    parser.add_argument("--gemini-latency-ms", type=float, default=50, help="--gemini: stub server response delay")
+    parser.add_argument("--gemini-connections", type=int, default=8, help="--gemini: like gemini_max_connections")
+    parser.add_argument("--gemini-rate", type=float, default=15, help="--gemini: AI checks arriving per second for the key run")
+    parser.add_argument("--gemini-keys", type=int, default=4, help="--gemini: API keys in the key run")
+    parser.add_argument("--gemini-key-limit", type=int, default=5,
+                        help="--gemini: stub requests allowed per key per window (0 = skip the key run)")
+    parser.add_argument("--gemini-key-window-s", type=float, default=1.0, help="--gemini: stub rate-limit window")
+    parser.add_argument("--gemini-slow-fraction", type=float, default=0.02,
+                        help="--gemini: share of stub responses that are slow, for the hedging run (0 = skip)")
+    parser.add_argument("--gemini-slow-ms", type=float, default=2000, help="--gemini: delay of a slow stub response")
+    parser.add_argument("--hedge-percentile", type=float, default=95, help="--gemini: like gemini_hedge_percentile")
+    parser.add_argument("--hedge-budget", type=float, default=0.1, help="--gemini: like gemini_hedge_budget")
+    args = parser.parse_args()
+
+    if args.gemini:
+        results = run_gemini(args.gemini_url, args.gemini_requests, args.gemini_concurrency,
+                             args.gemini_latency_ms, args.gemini_connections, args.gemini_rate,
+                             args.gemini_keys, args.gemini_key_limit, args.gemini_key_window_s,
+                             args.gemini_slow_fraction, args.gemini_slow_ms, args.hedge_percentile, args.hedge_budget)
+        if results is None:
+            return
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print_gemini_report(results)
+        print(f'💾 Results written to {args.output}')
+        return
+
+    if args.translation:
+        corpus = generate_corpus(load_words(args.words), PatternDetector().substitutions, args.messages, args.seed)
+        results = run_translation(corpus, args.rate, args.translation_workers, args.translation_latency_ms, args.batch_size)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print_translation_report(results)
+        print(f'💾 Results written to {args.output}')
+        return
+
+    words = load_words(args.words)
+    word_lists = load_word_lists(args.words)
+    categories = load_categories(args.words)
+    corpus = generate_corpus(words, PatternDetector().substitutions, args.messages, args.seed)
+    engines = ENGINES if args.engine == "all" else (args.engine,)
+
+    results = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "words": len(words),
+        "scan_time_budget_ms": args.budget_ms,
+        "corpus": {
+            "messages": len(corpus),
+            "seed": args.seed,
+            "kinds": {kind: sum(1 for sample in corpus if sample.kind == kind) for kind in CORPUS_KINDS},
+        },
+        "engines": {engine: run_engine(engine, words, word_lists, categories, corpus, args.budget_ms, args.workers, args.fuzzy_distance) for engine in engines},
+    }
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != results["corpus"]:
+            print("⚠️ Baseline used a different corpus - accuracy deltas are not comparable")
+        results["baseline_comparison"] = compare(results, baseline)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+
+    print_report(results)
+    print(f'💾 Results written to {args.output}')
+
+    failures = [
+        f"scan budget overrun on {engine}"
+        for engine, result in results["engines"].items() if not result["budget_check"]["within"]
+    ] + [
+        f"prefilter lost hits on {engine}"
+        for engine, result in results["engines"].items() if result["prefilter_recall"]["lost"]
+    ]
+    if failures:
+        raise SystemExit(f"❌ {'; '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
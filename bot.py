@@ -8,7 +8,6 @@ import asyncio
 from datetime import datetime, time
 import pytz
 import io
-import aiohttp
 
 # Fix matplotlib warnings
 import matplotlib
@@ -16,11 +15,14 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 plt.rcParams['font.family'] = 'DejaVu Sans'
 
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from deep_translator import GoogleTranslator
 from dotenv import load_dotenv
 import re
 import random
+from time import perf_counter
 
 # Keepalive for hosting stability
 try:
@@ -31,7 +33,12 @@ except ImportError:
 
 load_dotenv()
 
-from pattern_detector import PatternDetector
+from pattern_detector import DetectorPool, PatternDetector, strongest_hit
+from language_detector import LanguageDetector
+from response_cache import LRUCache, text_key
+from batching import MicroBatcher, process_joined
+from gemini_client import (GEMINI_URL, HedgeBudget, KeyScheduler, RequestTimings, create_session, hedge_delay,
+                           post_with_key, race, scheduled_attempts)
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -39,8 +46,16 @@ intents.messages = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+class ModerationBot(commands.Bot):
+    async def close(self):
+        # Close the pooled Gemini connections while the event loop is still running
+        await close_gemini_session()
+        await super().close()
+
+bot = ModerationBot(command_prefix="!", intents=intents)
 detector = PatternDetector()
+detector_pool = None
+language_detector = LanguageDetector()
 
 CONFIG_FILE = "config.json"
 SLURS_FILE = "slur_patterns.json"
@@ -49,6 +64,18 @@ STATS_FILE = "daily_stats.json"
 WHITELIST_FILE = "whitelist.json"
 REPORTS_FILE = "reports.json"
 USER_HISTORY_FILE = "user_history.json"
+# Next to bot.py, so the cache is found whatever directory the bot is started from
+MATCHER_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "matcher_cache.pkl")
+TRANSLATION_CACHE_FILE = "translation_cache.json"
+# deep-translator rejects longer texts; bigger batches are translated one message at a time
+TRANSLATION_MAX_CHARS = 5000
+TRANSLATION_LATENCY_SAMPLES = 200
+VERDICT_CACHE_FILE = "verdict_cache.json"
+# Part of every verdict cache key: bump when the Gemini prompt changes so old verdicts aren't reused
+GEMINI_PROMPT_VERSION = "1"
+GEMINI_LATENCY_SAMPLES = 200
+# Below this many latency samples, hedging waits gemini_hedge_delay_ms instead of a percentile
+GEMINI_HEDGE_MIN_SAMPLES = 20
 
 config = {
     "enabled": False,
@@ -57,17 +84,61 @@ config = {
     "report_channel_id": None,
     "mod_alert_channel_id": None,
     "gemini_api_keys": [],
-    "current_key_index": 0,
     "severity_threshold": 9,
     "mod_mode": "calm",
     "last_api_call": {},
     "dm_on_violation": True,
     "auto_escalate": True,
-    "escalation_enabled": True
+    "escalation_enabled": True,
+    "detection_engine": "automaton",
+    "scan_time_budget_ms": 50,
+    "auto_reload_patterns": True,
+    "matcher_cache": True,
+    "detection_workers": 0,
+    "full_match_logging": False,
+    "translation_workers": 4,
+    "translation_timeout_seconds": 5,
+    "translation_max_pending": 32,
+    "local_language_detection": True,
+    "translation_cache_size": 5000,
+    "translation_cache_persist": True,
+    "translation_batch_window_ms": 25,
+    "translation_batch_size": 8,
+    "gemini_max_connections": 8,
+    "verdict_cache_size": 2000,
+    "verdict_cache_ttl_minutes": 60,
+    "verdict_cache_persist": True,
+    "gemini_batch_window_ms": 50,
+    "gemini_batch_size": 5,
+    "gemini_key_rpm": 0,
+    "gemini_key_rpd": 0,
+    "gemini_hedging": False,
+    "gemini_hedge_percentile": 95,
+    "gemini_hedge_delay_ms": 2000,
+    "gemini_hedge_budget": 0.1
 }
 
 slur_patterns = []
 slur_categories = {}
+slur_file_mtime = None
+slur_reload_lock = None
+translation_executor = None
+translation_batcher = None
+translation_lock = threading.Lock()
+translation_stats = {
+    "pending": 0, "completed": 0, "timeouts": 0, "errors": 0, "rejected": 0,
+    "checked": 0, "skipped_english": 0, "requests": 0, "translated": 0
+}
+translation_latencies = deque(maxlen=TRANSLATION_LATENCY_SAMPLES)
+translation_cache = LRUCache()
+verdict_cache = LRUCache(2000, ttl=3600)
+gemini_session = None
+gemini_batcher = None
+key_scheduler = None
+hedge_budget = None
+gemini_stats = {"analysed": 0, "requests": 0, "batches": 0, "batch_fallbacks": 0, "hedges": 0, "hedge_wins": 0}
+gemini_latencies = deque(maxlen=GEMINI_LATENCY_SAMPLES)
+gemini_timings = RequestTimings()
 violation_logs = []
 whitelist = {"users": [], "roles": []}
 reports_database = {"reports": [], "next_id": 1}
@@ -109,25 +180,19 @@ def load_config():
         config["severity_threshold"] = 7
     if "mod_mode" not in config:
         config["mod_mode"] = "calm"
+    try:
+        detector.set_engine(config.get("detection_engine", "automaton"))
+    except ValueError as e:
+        print(f"⚠️ {e} - using automaton")
+        config["detection_engine"] = "automaton"
+        detector.set_engine("automaton")
+    budget_ms = config.get("scan_time_budget_ms", 50)
+    detector.time_budget = budget_ms / 1000 if budget_ms else None
 
 def save_config():
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=4)
 
-def load_slur_categories():
-    global slur_categories
-    slur_categories = {}
-    if os.path.exists(SLURS_FILE):
-        try:
-            with open(SLURS_FILE, 'r') as f:
-                data = json.load(f)
-            for category, value in data.items():
-                if not category.startswith('_') and isinstance(value, dict) and 'words' in value:
-                    slur_categories[category] = value
-            print(f"✅ Loaded {len(slur_categories)} categories from database")
-        except Exception as e:
-            print(f"❌ Error loading categories: {e}")
-
 def load_reports():
     global reports_database
     if os.path.exists(REPORTS_FILE):
@@ -190,32 +255,157 @@ def get_escalation_action(violation_count):
         return escalation_matrix[6]
     return escalation_matrix.get(violation_count, escalation_matrix[1])
 
-def get_category_for_word(word):
-    for category, data in slur_categories.items():
-        if word in data.get("words", []):
-            return category
-    return "unknown"
+def parse_slur_file(raw):
+    """
+    Parse the contents of slur_patterns.json into (word lists per category, categories).
+    Pruning redundant entries is left to the matcher build, which the cache skips.
+    """
+    data = json.loads(raw)
+    word_lists = {}
+    categories = {}
+    for category, value in data.items():
+        if not category.startswith('_'):
+            if isinstance(value, dict) and 'words' in value:
+                categories[category] = value
+                word_lists[category] = [w for w in value['words'] if not w.startswith('_')]
+            elif isinstance(value, list):
+                word_lists[category] = [w for w in value if not w.startswith('_')]
+    
+    categories = {category: dict(value, words=word_lists[category]) for category, value in categories.items()}
+    return word_lists, categories
+
+def print_word_list_report(report):
+    removed = report['entries'] - report['kept']
+    if not removed:
+        return
+    percent = removed / report['entries'] * 100
+    print(
+        f"🧹 Word list compiled: {report['entries']} → {report['kept']} entries ({percent:.0f}% fewer patterns; "
+        f"{report['duplicates']} duplicates, {report['spelling_variants']} spelling variants, "
+        f"{report['suffix_forms']} plural/possessive forms)"
+    )
+
+def install_slur_database(patterns, categories, matcher, mtime):
+    """Swap in a new word list. No awaits here, so no message is scanned halfway through the swap"""
+    global slur_patterns, slur_categories, slur_file_mtime
+    detector.install_matcher(matcher)
+    indexed = detector.set_categories(categories)
+    slur_patterns = patterns
+    slur_categories = categories
+    slur_file_mtime = mtime
+    if detector_pool is not None:
+        detector_pool.load()
+    return indexed
+
+def start_detector_pool():
+    """Start the worker processes for pattern matching if detection_workers is set"""
+    global detector_pool
+    workers = config.get("detection_workers", 0)
+    if not workers or detector_pool is not None or detector.matcher is None:
+        return
+    try:
+        detector_pool = DetectorPool(detector, workers)
+        print(f"✅ Detection pool started with {detector_pool.workers} worker(s)")
+    except Exception as e:
+        print(f"❌ Could not start detection pool: {e} - scanning in-process")
+
+def build_cached_matcher(raw, word_lists):
+    """
+    Load the compiled matcher (with its pruned word list) from MATCHER_CACHE_FILE if it
+    was built from this exact word file and substitution table, otherwise build it and
+    refresh the cache.
+    Returns: (matcher, from_cache)
+    """
+    if not config.get("matcher_cache", True):
+        return rebuild_matcher(raw, word_lists), False
+    
+    matcher = detector.load_matcher(MATCHER_CACHE_FILE, detector.cache_key(raw))
+    if matcher is not None:
+        return matcher, True
+    
+    return rebuild_matcher(raw, word_lists), False
+
+def rebuild_matcher(raw, word_lists):
+    """Prune the word lists, build the matcher from the live one (unchanged words keep their regexes) and refresh the cache"""
+    matcher = detector.build_word_list_matcher(word_lists)
+    if config.get("matcher_cache", True):
+        try:
+            detector.save_matcher(MATCHER_CACHE_FILE, detector.cache_key(raw), matcher)
+        except Exception as e:
+            print(f"⚠️ Could not write matcher cache: {e}")
+    return matcher
 
 def load_slur_patterns():
-    global slur_patterns
-    patterns = []
     if os.path.exists(SLURS_FILE):
         try:
-            with open(SLURS_FILE, 'r') as f:
-                data = json.load(f)
-            for category, value in data.items():
-                if not category.startswith('_'):
-                    if isinstance(value, dict) and 'words' in value:
-                        patterns.extend([w for w in value['words'] if not w.startswith('_')])
-                    elif isinstance(value, list):
-                        patterns.extend([w for w in value if not w.startswith('_')])
-            slur_patterns = patterns
-            print(f"✅ Loaded {len(slur_patterns)} patterns from database")
+            mtime = os.path.getmtime(SLURS_FILE)
+            if detector.matcher is not None and mtime == slur_file_mtime:
+                print(f"✅ Patterns unchanged since last load ({len(slur_patterns)} patterns)")
+                return
+            
+            started = perf_counter()
+            with open(SLURS_FILE, 'rb') as f:
+                raw = f.read()
+            word_lists, categories = parse_slur_file(raw)
+            matcher, from_cache = build_cached_matcher(raw, word_lists)
+            patterns = list(matcher.source)
+            print_word_list_report(matcher.word_list_report)
+            indexed = install_slur_database(patterns, categories, matcher, mtime)
+            elapsed_ms = (perf_counter() - started) * 1000
+            
+            start_kind = "warm start from cache" if from_cache else "cold start"
+            print(f"✅ Loaded {len(slur_patterns)} patterns from database ({start_kind}, detector ready in {elapsed_ms:.0f} ms)")
+            print(f"✅ Loaded {len(slur_categories)} categories from database ({indexed} words indexed)")
         except Exception as e:
             print(f"❌ Error loading patterns: {e}")
     else:
         print(f"⚠️ Warning: {SLURS_FILE} not found")
 
+def prepare_slur_database(raw):
+    """Parse, prune and compile a word file. Blocking; reload_slur_patterns runs it in a thread"""
+    word_lists, categories = parse_slur_file(raw)
+    matcher = rebuild_matcher(raw, word_lists)
+    return list(matcher.source), categories, matcher
+
+def describe_rebuild(matcher):
+    """What a rebuild recompiled: the regex engine reuses unchanged words' regexes, the automata are rebuilt whole"""
+    if detector.engine == "regex":
+        return f"{matcher.recompiled} regexes compiled, {matcher.reused} reused"
+    return "automata rebuilt"
+
+async def reload_slur_patterns():
+    """
+    Re-read slur_patterns.json and swap in the new word list.
+    Parsing and compiling run in a worker thread; messages are scanned with
+    the old list until the swap.
+    Returns: the new matcher, or None if the file could not be loaded
+    """
+    global slur_reload_lock, slur_file_mtime
+    if slur_reload_lock is None:
+        slur_reload_lock = asyncio.Lock()
+    
+    async with slur_reload_lock:
+        mtime = None
+        try:
+            mtime = os.path.getmtime(SLURS_FILE)
+            with open(SLURS_FILE, 'rb') as f:
+                raw = f.read()
+            loop = asyncio.get_running_loop()
+            patterns, categories, matcher = await loop.run_in_executor(None, prepare_slur_database, raw)
+        except Exception as e:
+            print(f"❌ Error reloading patterns: {e} - keeping the current list")
+            # Don't retry a broken file until it changes again
+            slur_file_mtime = mtime or slur_file_mtime
+            return None
+
+        install_slur_database(patterns, categories, matcher, mtime)
+        print_word_list_report(matcher.word_list_report)
+        print(
+            f"🔄 Reloaded {len(patterns)} patterns (+{matcher.added} / -{matcher.removed} words, "
+            f"{describe_rebuild(matcher)}) in {matcher.build_seconds * 1000:.0f} ms"
+        )
+        return matcher
+
 async def send_enhanced_dm(user, triggered_word, category, severity, violation_count):
     """Send enhanced DM with triggered word and pre-filled warning"""
     if not config.get("dm_on_violation", True):
@@ -462,57 +652,259 @@ def save_stats():
     with open(STATS_FILE, 'w') as f:
         json.dump(stats_to_save, f, indent=4)
 
-def contains_slur(text):
-    """Check if text contains potential slurs"""
+async def contains_slur(text):
+    """Check if text contains potential slurs (pattern matches plus plain substrings)"""
+    hits = await find_slur_hits(text)
+    matches = matched_texts(hits)
+    return len(matches) > 0, matches
+
+async def find_slur_hits(text, stop_at_first=False):
+    """
+    Same check as contains_slur, returning Hits with base word, category, priority and span.
+    stop_at_first=True ends the scan at the first hit that settles the message on its own
+    (top priority, in a category with mod_alert); without one the whole text is scanned.
+    """
+    global detector_pool
     if not text:
-        return False, []
-    
-    found, matches = detector.check_text(text, slur_patterns)
-    if found:
-        return True, matches
-    
-    normalized = detector.normalize_text(text)
-    found_norm, matches_norm = detector.check_text(normalized, slur_patterns)
-    
-    all_matches = list(set(matches + matches_norm))
-    
-    text_lower = text.lower()
-    for pattern in slur_patterns:
-        if pattern in text_lower:
-            if pattern not in all_matches:
-                all_matches.append(pattern)
-        if pattern + 's' in text_lower:
-            if pattern not in all_matches:
-                all_matches.append(pattern)
-        if pattern + "'s" in text_lower:
-            if pattern not in all_matches:
-                all_matches.append(pattern)
-        if pattern + 'es' in text_lower:
-            if pattern not in all_matches:
-                all_matches.append(pattern)
-    
-    return len(all_matches) > 0, all_matches
+        return []
+    
+    if detector_pool is not None:
+        try:
+            return await asyncio.wrap_future(detector_pool.submit(text, substrings=True, stop_at_first=stop_at_first))
+        except Exception as e:
+            print(f"⚠️ Detection pool failed: {e} - scanning in-process")
+            detector_pool.shutdown()
+            detector_pool = None
+    
+    return detector.find_hits(text, slur_patterns, substrings=True, stop_at_first=stop_at_first)
+
+def matched_texts(hits):
+    """Distinct matched strings of a hit list, in order"""
+    return list(dict.fromkeys(hit.text for hit in hits))
+
+def get_key_scheduler():
+    """Per-key budgets and health, sized from gemini_key_rpm / gemini_key_rpd (0 = unlimited) on first use"""
+    global key_scheduler
+    if key_scheduler is None:
+        key_scheduler = KeyScheduler(
+            rpm=config.get("gemini_key_rpm", 0),
+            rpd=config.get("gemini_key_rpd", 0)
+        )
+    return key_scheduler
+
+def get_gemini_session():
+    """
+    The one aiohttp session every Gemini call goes through, created on first use.
+    Keep-alive connections are reused across calls, so a check only pays the
+    TCP/TLS handshake when no idle connection is left.
+    """
+    global gemini_session
+    if gemini_session is None or gemini_session.closed:
+        gemini_session = create_session(
+            max_connections=max(1, config.get("gemini_max_connections", 8)),
+            timeout=8,
+            trace_configs=[gemini_timings.trace_config]
+        )
+    return gemini_session
+
+async def close_gemini_session():
+    global gemini_session
+    if gemini_session is not None and not gemini_session.closed:
+        await gemini_session.close()
+    gemini_session = None
 
 async def check_severity_with_gemini(text, detected_words):
-    """Use Gemini 2.0 Flash via REST API to rate severity 1-10"""
-    if not config["gemini_api_keys"]:
-        print("⚠️ No API keys configured")
+    """
+    Severity verdict for text, from verdict_cache when the same text (ignoring
+    case and spacing) was rated with the same detected words and prompt version
+    within verdict_cache_ttl_minutes, otherwise from Gemini.
+    Returns None when no key gave an answer; failures aren't cached.
+    """
+    cache_key = text_key(text, ','.join(sorted(set(detected_words))), GEMINI_PROMPT_VERSION)
+    cached = verdict_cache.get(cache_key)
+    if cached is not None:
+        print(f"💾 AI (cached): Severity {cached.get('severity')}/10 - {cached.get('context')}")
+        return dict(cached)
+    
+    result = await request_gemini_severity(text, detected_words)
+    if result is not None:
+        verdict_cache.put(cache_key, result)
+    return result
+
+def strip_code_fence(reply):
+    """Gemini sometimes wraps JSON in a markdown code block despite the prompt"""
+    if "```json" in reply:
+        return reply.split("```json")[1].split("```")[0].strip()
+    if "```" in reply:
+        return reply.split("```")[1].split("```")[0].strip()
+    return reply
+
+def parse_severity_reply(reply):
+    """Verdict dict from a single-message reply, or None if it can't be read"""
+    reply = strip_code_fence(reply)
+    try:
+        result = json.loads(reply)
+        result["severity"] = int(result.get("severity", 10))
+        return result
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        severity_match = re.search(r'"severity":\s*(\d+)', reply)
+        context_match = re.search(r'"context":\s*"(\w+)"', reply)
+        
+        if severity_match:
+            severity = int(severity_match.group(1))
+            return {
+                "is_harmful": severity >= 7,
+                "severity": severity,
+                "reason": "Extracted",
+                "context": context_match.group(1) if context_match else "unknown"
+            }
         return None
+
+def parse_batch_reply(reply, count):
+    """
+    One verdict (or None) per message from a batch reply's JSON array.
+    Verdicts are matched by their "index"; entries without a usable index or
+    severity are left as None.
+    """
+    verdicts = [None] * count
+    try:
+        items = json.loads(strip_code_fence(reply))
+    except json.JSONDecodeError:
+        return verdicts
+    if not isinstance(items, list):
+        return verdicts
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("index"))
+            item["severity"] = int(item["severity"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < count and verdicts[index] is None:
+            item.pop("index")
+            verdicts[index] = item
+    return verdicts
+
+async def attempt_gemini(key_index, prompt, parse, max_output_tokens):
+    """
+    One request on one key.
+    Returns: (parsed reply, key index), or None if the key failed or the reply
+    couldn't be parsed
+    """
+    api_key = config["gemini_api_keys"][key_index]
+    print(f"🔑 Trying key #{key_index + 1}...")
     
-    total_keys = len(config["gemini_api_keys"])
-    print(f"🔑 Available keys: {total_keys}")
+    # Use gemini-2.0-flash (stable version, not exp)
+    payload = {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }],
+        "generationConfig": {
+            "temperature": 0.3,
+            "maxOutputTokens": max_output_tokens
+        }
+    }
     
-    # Try keys one by one, starting from the last successful key
-    start_index = config.get("current_key_index", 0)
+    gemini_stats["requests"] += 1
+    response = await post_with_key(get_gemini_session(), GEMINI_URL, api_key, payload, get_key_scheduler())
+    if response.status is None:
+        print(f"⚠️ Key #{key_index + 1}: {response.body[:50]}")
+        return None
+    elif response.status == 404:
+        print(f"⚠️ Key #{key_index + 1}: Model not found")
+        return None
+    elif response.status == 429:
+        print(f"⚠️ Key #{key_index + 1}: Rate limited")
+        return None
+    elif response.status == 400:
+        try:
+            error_msg = json.loads(response.body).get("error", {}).get("message", "Bad request")
+        except (ValueError, AttributeError):
+            error_msg = "Bad request"
+        print(f"⚠️ Key #{key_index + 1}: {error_msg[:50]}")
+        return None
+    elif response.status != 200:
+        print(f"❌ Key #{key_index + 1}: Error {response.status}")
+        return None
     
-    for attempt in range(total_keys):
-        key_index = (start_index + attempt) % total_keys
-        api_key = config["gemini_api_keys"][key_index]
-        
-        print(f"🔑 Trying key #{key_index + 1}...")
+    gemini_latencies.append(response.latency_ms)
+    data = response.body
+    try:
+        if "candidates" not in data or not data["candidates"]:
+            print(f"⚠️ Key #{key_index + 1}: No response")
+            return None
         
-        try:
-            prompt = f"""You are a content moderation assistant. Analyze this message for harmful intent.
+        result = parse(data["candidates"][0]["content"]["parts"][0]["text"].strip())
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        print(f"❌ Key #{key_index + 1}: Unexpected reply {str(e)[:50]}")
+        return None
+    if result is None:
+        print(f"⚠️ Key #{key_index + 1}: Parse error")
+        return None
+    
+    return result, key_index
+
+def get_hedge_delay():
+    """
+    Seconds to wait for a Gemini reply before hedging on another key: the
+    gemini_hedge_percentile of recent request latencies, or gemini_hedge_delay_ms
+    until there are enough samples. None when hedging is off
+    """
+    if not config.get("gemini_hedging", False):
+        return None
+    return hedge_delay(
+        gemini_latencies,
+        config.get("gemini_hedge_percentile", 95),
+        config.get("gemini_hedge_delay_ms", 2000) / 1000,
+        GEMINI_HEDGE_MIN_SAMPLES
+    )
+
+def get_hedge_budget():
+    global hedge_budget
+    if hedge_budget is None:
+        hedge_budget = HedgeBudget(ratio=config.get("gemini_hedge_budget", 0.1))
+    return hedge_budget
+
+async def call_gemini(prompt, parse, max_output_tokens=200):
+    """
+    Send prompt to Gemini, trying the keys the scheduler says are usable,
+    healthiest first, until one replies with text parse() accepts (doesn't
+    return None). Keys cooling down after a 429 or repeated failures are
+    skipped without a request; keys past their local budget are tried last.
+    With gemini_hedging on, a reply slower than get_hedge_delay() makes the next
+    key start alongside it (within the hedge budget); the first reply wins.
+    Returns: (parsed reply, key index), or (None, None) when every key failed
+    """
+    keys = config["gemini_api_keys"]
+    if not keys:
+        print("⚠️ No API keys configured")
+        return None, None
+    
+    scheduler = get_key_scheduler()
+    candidates = scheduler.order(keys)
+    print(f"🔑 Available keys: {len(candidates)}/{len(keys)}")
+    if not candidates:
+        print("⏳ All keys rate limited or failing - cooling down")
+        return None, None
+    
+    attempts = scheduled_attempts(
+        scheduler, keys, lambda key_index: attempt_gemini(key_index, prompt, parse, max_output_tokens), candidates
+    )
+    delay = get_hedge_delay()
+    outcome = await race(attempts, delay, get_hedge_budget() if delay is not None else None)
+    gemini_stats["hedges"] += outcome.hedges
+    if outcome.hedge_won:
+        gemini_stats["hedge_wins"] += 1
+        print(f"🏁 Hedged request answered first (after {delay * 1000:.0f} ms)")
+    if outcome.result is None:
+        print("❌ All keys failed")
+        return None, None
+    return outcome.result
+
+async def ask_gemini_severity(text, detected_words):
+    """Use Gemini 2.0 Flash via REST API to rate severity 1-10"""
+    prompt = f"""You are a content moderation assistant. Analyze this message for harmful intent.
 
 Detected words: {', '.join(detected_words)}
 Full message: "{text}"
@@ -525,114 +917,277 @@ Rate the severity from 1-10:
 
 Respond ONLY with valid JSON (no markdown, no code blocks):
 {{"is_harmful": true, "severity": 8, "reason": "brief explanation", "context": "hostile"}}"""
+    
+    gemini_stats["analysed"] += 1
+    result, key_index = await call_gemini(prompt, parse_severity_reply)
+    if result is not None:
+        print(f"✅ AI (key #{key_index + 1}): Severity {result['severity']}/10 - {result.get('context')} - {result.get('reason')}")
+    return result
 
-            # Use gemini-2.0-flash (stable version, not exp)
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "maxOutputTokens": 200
-                }
-            }
-            
-            timeout = aiohttp.ClientTimeout(total=8)
-            
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 404:
-                        print(f"⚠️ Key #{key_index + 1}: Model not found")
-                        continue
-                    elif response.status == 429:
-                        print(f"⚠️ Key #{key_index + 1}: Rate limited")
-                        continue
-                    elif response.status == 400:
-                        error_data = await response.json()
-                        error_msg = error_data.get("error", {}).get("message", "Bad request")
-                        print(f"⚠️ Key #{key_index + 1}: {error_msg[:50]}")
-                        continue
-                    elif response.status != 200:
-                        print(f"❌ Key #{key_index + 1}: Error {response.status}")
-                        continue
-                    
-                    data = await response.json()
-            
-            if "candidates" not in data or not data["candidates"]:
-                print(f"⚠️ Key #{key_index + 1}: No response")
-                continue
-            
-            result_text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
-            
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-            
-            try:
-                result = json.loads(result_text)
-                result["severity"] = int(result.get("severity", 10))
-                
-                print(f"✅ AI (key #{key_index + 1}): Severity {result['severity']}/10 - {result.get('context')} - {result.get('reason')}")
-                
-                # Save this working key as the starting point for next time
-                config["current_key_index"] = key_index
-                save_config()
-                
-                return result
-                
-            except json.JSONDecodeError:
-                severity_match = re.search(r'"severity":\s*(\d+)', result_text)
-                context_match = re.search(r'"context":\s*"(\w+)"', result_text)
-                
-                if severity_match:
-                    severity = int(severity_match.group(1))
-                    context = context_match.group(1) if context_match else "unknown"
-                    print(f"✅ AI (key #{key_index + 1}): Severity {severity}/10 - {context}")
-                    
-                    # Save this working key
-                    config["current_key_index"] = key_index
-                    save_config()
-                    
-                    return {
-                        "is_harmful": severity >= 7,
-                        "severity": severity,
-                        "reason": "Extracted",
-                        "context": context
-                    }
-                
-                print(f"⚠️ Key #{key_index + 1}: Parse error")
-                continue
-            
-        except asyncio.TimeoutError:
-            print(f"⚠️ Key #{key_index + 1}: Timeout")
-            continue
-            
-        except Exception as e:
-            print(f"❌ Key #{key_index + 1}: {str(e)[:50]}")
-            continue
+async def ask_gemini_severity_batch(items):
+    """
+    Rate several (text, detected_words) pairs with one Gemini request that asks
+    for a JSON array of verdicts. Messages whose verdict is missing or unreadable
+    are retried one at a time; if the batch request itself fails on every key,
+    they all get None like a single failed check.
+    Copies of the same message (raid spam) share one slot in the prompt.
+    """
+    keys = [text_key(text, ','.join(sorted(set(words)))) for text, words in items]
+    slots = {}
+    for key in keys:
+        slots.setdefault(key, len(slots))
+    if len(slots) < len(items):
+        unique = [items[keys.index(key)] for key in slots]
+        verdicts = await ask_gemini_severity_batch(unique)
+        return [verdicts[slots[key]] for key in keys]
+
+    if len(items) == 1:
+        return [await ask_gemini_severity(*items[0])]
     
-    print("❌ All keys failed")
-    return None
+    messages = '\n'.join(
+        f'[{index}] Detected words: {", ".join(words)}\n    Full message: {json.dumps(text, ensure_ascii=False)}'
+        for index, (text, words) in enumerate(items)
+    )
+    prompt = f"""You are a content moderation assistant. Analyze each numbered message below for harmful intent, independently of the others.
+
+{messages}
+
+Rate each message's severity from 1-10:
+- 1-3: Playful banter, friendly joking, no malice
+- 4-6: Potentially inappropriate but context matters
+- 7-8: Clear insults, slurs with negative intent
+- 9-10: Severe hate speech, death threats
+
+Respond ONLY with a valid JSON array (no markdown, no code blocks) holding one object per message, with its number as "index":
+[{{"index": 0, "is_harmful": true, "severity": 8, "reason": "brief explanation", "context": "hostile"}}]"""
+    
+    gemini_stats["analysed"] += len(items)
+    gemini_stats["batches"] += 1
+    verdicts, key_index = await call_gemini(
+        prompt, lambda reply: parse_batch_reply(reply, len(items)), max_output_tokens=100 + 100 * len(items)
+    )
+    if verdicts is None:
+        return [None] * len(items)
+    
+    missing = [index for index, verdict in enumerate(verdicts) if verdict is None]
+    print(f"✅ AI batch (key #{key_index + 1}): {len(items) - len(missing)}/{len(items)} verdicts")
+    if missing:
+        gemini_stats["batch_fallbacks"] += len(missing)
+        retried = await asyncio.gather(*(ask_gemini_severity(*items[index]) for index in missing))
+        for index, verdict in zip(missing, retried):
+            verdicts[index] = verdict
+    return verdicts
+
+def get_gemini_batcher():
+    """
+    Coalesces AI checks requested within gemini_batch_window_ms, up to
+    gemini_batch_size at a time. None when batching is off (size 1)
+    """
+    global gemini_batcher
+    if gemini_batcher is None and config.get("gemini_batch_size", 5) > 1:
+        gemini_batcher = MicroBatcher(
+            ask_gemini_severity_batch,
+            window=config.get("gemini_batch_window_ms", 50) / 1000,
+            max_size=config.get("gemini_batch_size", 5),
+            max_concurrent=max(1, config.get("gemini_max_connections", 8))
+        )
+    return gemini_batcher
+
+async def request_gemini_severity(text, detected_words):
+    batcher = get_gemini_batcher()
+    if batcher is not None:
+        return await batcher.submit((text, list(detected_words)))
+    return await ask_gemini_severity(text, detected_words)
+
+def get_translation_executor():
+    """Threads for the blocking deep-translator calls, created on first use"""
+    global translation_executor
+    if translation_executor is None:
+        translation_executor = ThreadPoolExecutor(
+            max_workers=max(1, config.get("translation_workers", 4)),
+            thread_name_prefix="translate"
+        )
+    return translation_executor
+
+def translate_blocking(text, source='auto'):
+    """Runs on a translation thread; the slot is freed only once the HTTP call returns"""
+    try:
+        translated = GoogleTranslator(source=source, target='en').translate(text)
+        with translation_lock:
+            translation_stats["requests"] += 1
+            translation_stats["translated"] += 1
+        return translated
+    finally:
+        with translation_lock:
+            translation_stats["pending"] -= 1
+
+def translate_batch_blocking(items):
+    """
+    Runs on a translation thread: one request for the whole batch of (text, source)
+    items, joined with numbered markers. Falls back to one request per message when
+    the batch can't be joined safely, is too long, or doesn't split back into the
+    same messages. The batcher groups items by source, so they all share one.
+    """
+    texts = [text for text, _ in items]
+    try:
+        translator = GoogleTranslator(source=items[0][1], target='en')
+        translated, requests = process_joined(translator.translate, texts, TRANSLATION_MAX_CHARS)
+        with translation_lock:
+            translation_stats["requests"] += requests
+            translation_stats["translated"] += len(texts)
+        return translated
+    finally:
+        with translation_lock:
+            translation_stats["pending"] -= len(texts)
+
+async def translate_batch(items):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_translation_executor(), translate_batch_blocking, items)
+
+def get_translation_batcher():
+    """
+    Coalesces translations requested within translation_batch_window_ms, up to
+    translation_batch_size at a time, one source language per batch. None when
+    batching is off (size 1)
+    """
+    global translation_batcher
+    if translation_batcher is None and config.get("translation_batch_size", 8) > 1:
+        translation_batcher = MicroBatcher(
+            translate_batch,
+            window=config.get("translation_batch_window_ms", 25) / 1000,
+            max_size=config.get("translation_batch_size", 8),
+            max_concurrent=max(1, config.get("translation_workers", 4)),
+            key=lambda item: item[1]
+        )
+    return translation_batcher
+
+async def request_translation(text, source='auto'):
+    batcher = get_translation_batcher()
+    if batcher is not None:
+        return await batcher.submit((text, source))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_translation_executor(), translate_blocking, text, source)
+
+def load_translation_cache():
+    """Resize the cache from config and, on first start, fill it from TRANSLATION_CACHE_FILE"""
+    translation_cache.resize(config.get("translation_cache_size", 5000))
+    if len(translation_cache) or not config.get("translation_cache_persist", True):
+        return
+    if os.path.exists(TRANSLATION_CACHE_FILE):
+        try:
+            loaded = translation_cache.load(TRANSLATION_CACHE_FILE)
+            print(f"✅ Loaded {loaded} cached translations")
+        except Exception as e:
+            print(f"⚠️ Could not read translation cache: {e}")
+
+def save_translation_cache():
+    if not config.get("translation_cache_persist", True) or not translation_cache.dirty:
+        return
+    try:
+        translation_cache.save(TRANSLATION_CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ Could not write translation cache: {e}")
+
+def load_verdict_cache():
+    """Apply size and TTL from config and, on first start, fill the cache from VERDICT_CACHE_FILE"""
+    verdict_cache.ttl = max(1, config.get("verdict_cache_ttl_minutes", 60)) * 60
+    verdict_cache.resize(config.get("verdict_cache_size", 2000))
+    if len(verdict_cache) or not config.get("verdict_cache_persist", True):
+        return
+    if os.path.exists(VERDICT_CACHE_FILE):
+        try:
+            loaded = verdict_cache.load(VERDICT_CACHE_FILE)
+            print(f"✅ Loaded {loaded} cached AI verdicts")
+        except Exception as e:
+            print(f"⚠️ Could not read verdict cache: {e}")
+
+def save_verdict_cache():
+    if not config.get("verdict_cache_persist", True) or not verdict_cache.dirty:
+        return
+    try:
+        verdict_cache.save(VERDICT_CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ Could not write verdict cache: {e}")
+
+def translation_status():
+    """Queue depth and latency of recent translations, for /status"""
+    latencies = sorted(translation_latencies)
+    # Messages the threads can work on at once; batching puts several in one request
+    capacity = max(1, config.get("translation_workers", 4)) * max(1, config.get("translation_batch_size", 8))
+    with translation_lock:
+        pending = translation_stats["pending"]
+        stats = dict(translation_stats)
+    return {
+        **stats,
+        "running": min(pending, capacity),
+        "queued": max(0, pending - capacity),
+        "avg_ms": sum(latencies) / len(latencies) if latencies else 0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else 0,
+        "skip_rate": stats["skipped_english"] / stats["checked"] if stats["checked"] else 0,
+        "cache": translation_cache.stats(),
+        "per_request": stats["translated"] / stats["requests"] if stats["requests"] else 0,
+    }
 
 async def translate_text_free(text):
-    """Translate text using deep-translator"""
+    """
+    Translate text using deep-translator.
+    Text the local language detector reads as English is returned as is, and
+    repeats of an earlier message (same text ignoring case and spacing) are
+    answered from translation_cache. A language the detector is sure of is
+    passed to the translator as the source; otherwise it auto-detects.
+    The HTTP call runs on a bounded thread pool so the event loop keeps serving
+    other messages, heartbeats and commands. Calls slower than
+    translation_timeout_seconds, or made while translation_max_pending calls are
+    already waiting, return the original text.
+    """
     if not text or not text.strip():
         return text, 'unknown'
     
+    source = 'auto'
+    if config.get("local_language_detection", True):
+        detected_lang, confident = language_detector.identify(text)
+        translation_stats["checked"] += 1
+        if detected_lang in ("en", None):
+            translation_stats["skipped_english"] += 1
+            return text, 'en'
+        if confident:
+            source = detected_lang
+    
+    cache_key = text_key(text)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        translated, source_lang = cached
+        return translated, source_lang
+    
+    with translation_lock:
+        if translation_stats["pending"] >= config.get("translation_max_pending", 32):
+            translation_stats["rejected"] += 1
+            print("⚠️ Translation queue full - checking original text only")
+            return text, 'unknown'
+        translation_stats["pending"] += 1
+    
+    started = perf_counter()
     try:
-        translator = GoogleTranslator(source='auto', target='en')
-        translated = translator.translate(text)
+        translated = await asyncio.wait_for(
+            request_translation(text, source),
+            timeout=config.get("translation_timeout_seconds", 5)
+        )
+        translation_latencies.append((perf_counter() - started) * 1000)
+        translation_stats["completed"] += 1
         
-        source_lang = 'auto'
+        source_lang = source
         if translated.strip().lower() == text.strip().lower():
             source_lang = 'en'
         
+        translation_cache.put(cache_key, (translated, source_lang))
         return translated, source_lang
         
+    except asyncio.TimeoutError:
+        translation_stats["timeouts"] += 1
+        print("⚠️ Translation timed out - checking original text only")
+        return text, 'unknown'
     except Exception as e:
+        translation_stats["errors"] += 1
         print(f"⚠️ Translation error: {e}")
         return text, 'unknown'
 
@@ -723,16 +1278,32 @@ async def generate_daily_report():
 async def daily_report_task():
     await generate_daily_report()
 
+@tasks.loop(minutes=5)
+async def save_caches_task():
+    save_translation_cache()
+    save_verdict_cache()
+
+@tasks.loop(seconds=10)
+async def watch_slur_file():
+    if not config.get("auto_reload_patterns", True) or not os.path.exists(SLURS_FILE):
+        return
+    if os.path.getmtime(SLURS_FILE) != slur_file_mtime:
+        print(f"📝 {SLURS_FILE} changed on disk")
+        await reload_slur_patterns()
+
 @bot.event
 async def on_ready():
     load_config()
     load_slur_patterns()
-    load_slur_categories()
+    start_detector_pool()
     load_logs()
     load_stats()
     load_whitelist()
     load_reports()
     load_user_history()
+    load_translation_cache()
+    load_verdict_cache()
+    get_gemini_session()
 
     env_key_count = load_api_keys_from_env()
 
@@ -745,6 +1316,12 @@ async def on_ready():
     if not daily_report_task.is_running():
         daily_report_task.start()
 
+    if not watch_slur_file.is_running():
+        watch_slur_file.start()
+
+    if not save_caches_task.is_running():
+        save_caches_task.start()
+
     print(f'\n{"="*60}')
     print(f'✅ {bot.user} has connected to Discord!')
     print(f'{"="*60}')
@@ -754,11 +1331,15 @@ async def on_ready():
     print(f'   • Whitelisted: {len(whitelist["users"])} users, {len(whitelist["roles"])} roles')
     print(f'   • Severity threshold: {config.get("severity_threshold", 7)}/10')
     print(f'   • Moderation mode: {config.get("mod_mode", "calm").upper()}')
+    print(f'   • Detection engine: {detector.engine}')
+    print(f'   • Detection workers: {detector_pool.workers if detector_pool else "in-process"}')
+    print(f'   • Pattern auto-reload: {"on" if config.get("auto_reload_patterns", True) else "off"}')
+    print(f'   • Scan time budget: {config.get("scan_time_budget_ms", 50) or "unlimited"} ms')
     print(f'   • API keys: {len(config["gemini_api_keys"])} configured')
     print(f'   • Report channel: {config.get("report_channel_id") or "Not set"}')
     print(f'   • Mod alert channel: {config.get("mod_alert_channel_id") or "Not set"}')
     print(f'\n📋 Feature Status:')
-    print(f'   ✅ Translation: Enabled')
+    print(f'   ✅ Translation: Enabled ({config.get("translation_workers", 4)} threads, {config.get("translation_timeout_seconds", 5)}s timeout)')
     print(f'   ✅ Pattern Detection: Enabled')
     print(f'   ✅ AI Analysis (Gemini 2.5 Flash): Enabled')
     print(f'   ✅ Enhanced DM System: Enabled')
@@ -1039,6 +1620,40 @@ async def listkeys(interaction: discord.Interaction):
     ])
     await interaction.response.send_message(f"**API Keys ({len(config['gemini_api_keys'])})**:\n```{key_list}```", ephemeral=True)
 
+@bot.tree.command(name="keystats", description="Per-key API usage, rate limits and health")
+async def keystats(interaction: discord.Interaction):
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("❌ Admin only.", ephemeral=True)
+        return
+    keys = config["gemini_api_keys"]
+    if not keys:
+        await interaction.response.send_message("⚠️ No keys configured.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(title="🔑 API Key Usage", color=discord.Color.blue())
+    for i, (key, usage) in enumerate(zip(keys, get_key_scheduler().utilization(keys))):
+        if usage["cooldown_seconds"]:
+            state = f"⏳ cooling down {usage['cooldown_seconds']}s"
+        elif usage["day_limit"] and usage["day_used"] >= usage["day_limit"]:
+            state = "⚠️ daily budget used (tried last)"
+        elif usage["minute_limit"] and usage["minute_used"] >= usage["minute_limit"]:
+            state = "⚠️ minute budget used (tried last)"
+        else:
+            state = "✅ ready"
+        minute = f"{usage['minute_used']}/{usage['minute_limit']} this minute" if usage["minute_limit"] else "no minute budget"
+        day = f"{usage['day_used']}/{usage['day_limit']} of daily budget" if usage["day_limit"] else "no daily budget"
+        embed.add_field(
+            name=f"Key #{i+1}: {key[:10]}...{key[-4:]}",
+            value=(
+                f"{state}\n"
+                f"{minute}, {day}, {usage['requests']} requests\n"
+                f"{usage['successes']} ok, {usage['rate_limited']} rate limited, {usage['failures']} failed\n"
+                f"error rate {usage['error_rate']:.0%}, avg {usage['latency_ms']:.0f} ms"
+            ),
+            inline=True
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="removekey")
 @app_commands.describe(key_number="Key number to remove")
 async def removekey(interaction: discord.Interaction, key_number: int):
@@ -1162,6 +1777,42 @@ async def status(interaction: discord.Interaction):
     embed.add_field(name="Monitored", value=monitored.mention if monitored else "Not set", inline=True)
     embed.add_field(name="Log Channel", value=log_ch.mention if log_ch else "Not set", inline=True)
     embed.add_field(name="Patterns", value=str(len(slur_patterns)), inline=True)
+    embed.add_field(name="Engine", value=detector.engine, inline=True)
+    if detector.matcher:
+        embed.add_field(
+            name="Prefilter",
+            value=f"{detector.matcher.prefilter.misses} skipped / {detector.matcher.prefilter.hits} scanned",
+            inline=True
+        )
+    embed.add_field(name="Scan Budget Hits", value=str(detector.budget_exceeded), inline=True)
+    embed.add_field(name="Exceptions Applied", value=str(detector.exceptions_applied), inline=True)
+    translation = translation_status()
+    embed.add_field(
+        name="Translation",
+        value=(
+            f"{translation['running']} running, {translation['queued']} queued\n"
+            f"avg {translation['avg_ms']:.0f} ms, p95 {translation['p95_ms']:.0f} ms\n"
+            f"{translation['timeouts']} timed out, {translation['rejected']} skipped\n"
+            f"{translation['skip_rate']:.0%} not sent (already English)\n"
+            f"cache: {translation['cache']['entries']} entries, {translation['cache']['hit_rate']:.0%} hit rate\n"
+            f"{translation['per_request']:.1f} messages per request"
+        ),
+        inline=True
+    )
+    ai_calls = gemini_timings.summary()
+    verdicts = verdict_cache.stats()
+    embed.add_field(
+        name="AI Calls",
+        value=(
+            f"{ai_calls['requests']} requests, {ai_calls['connections_opened']} new connections\n"
+            f"handshake avg {ai_calls['avg_connect_ms']:.0f} ms, request avg {ai_calls['avg_request_ms']:.0f} ms\n"
+            f"verdict cache: {verdicts['entries']} entries, {verdicts['hit_rate']:.0%} hit rate\n"
+            f"{gemini_stats['analysed'] / gemini_stats['requests'] if gemini_stats['requests'] else 0:.1f} messages per request, "
+            f"{gemini_stats['batch_fallbacks']} batch fallbacks\n"
+            f"{gemini_stats['hedges']} hedged, {gemini_stats['hedge_wins']} won by the hedge"
+        ),
+        inline=True
+    )
     embed.add_field(name="API Keys", value=str(len(config["gemini_api_keys"])), inline=True)
     embed.add_field(name="Today's Scans", value=str(daily_stats["messages_scanned"]), inline=True)
     embed.add_field(name="Today's Flags", value=str(daily_stats["messages_flagged"]), inline=True)
@@ -1176,6 +1827,26 @@ async def status(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+@bot.tree.command(name="reloadpatterns", description="Reload slur_patterns.json without restarting")
+async def reloadpatterns(interaction: discord.Interaction):
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("❌ Admin only.", ephemeral=True)
+        return
+    await interaction.response.defer(ephemeral=True)
+    
+    matcher = await reload_slur_patterns()
+    if matcher is None:
+        await interaction.followup.send("❌ Reload failed - check the console and the JSON file.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(title="🔄 Patterns Reloaded", color=discord.Color.green())
+    embed.add_field(name="Patterns", value=str(len(slur_patterns)), inline=True)
+    embed.add_field(name="Categories", value=str(len(slur_categories)), inline=True)
+    embed.add_field(name="Added / Removed", value=f"+{matcher.added} / -{matcher.removed}", inline=True)
+    embed.add_field(name="Recompiled", value=describe_rebuild(matcher), inline=True)
+    embed.add_field(name="Rebuild Time", value=f"{matcher.build_seconds * 1000:.0f} ms", inline=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="forcereport")
 async def forcereport(interaction: discord.Interaction):
     if not interaction.user.guild_permissions.administrator:
@@ -1222,6 +1893,8 @@ async def help_command(interaction: discord.Interaction):
                   "`/whitelist_user [user]` - Whitelist a user\n"
                   "`/whitelist_role [role]` - Whitelist a role\n"
                   "`/status` - View bot status\n"
+                  "`/keystats` - View API key usage and health\n"
+                  "`/reloadpatterns` - Reload the word list\n"
                   "`/forcereport` - Generate daily report",
             inline=False
         )
@@ -1537,8 +2210,18 @@ async def on_message(message):
         mod_mode = config.get("mod_mode", "calm")
         full_text = message.content
         
+        # In relax mode any hit deletes the message, so once a hit also settles the
+        # logged category and mod alert, stop there (and skip translating) unless
+        # every match should be logged
+        early_exit = mod_mode == "relax" and not config.get("full_match_logging", False)
+        hits = None
+        settled = False
+        if early_exit:
+            hits = await find_slur_hits(full_text, stop_at_first=True)
+            settled = any(detector.settles(hit) for hit in hits)
+        
         translated_text = full_text
-        if full_text:
+        if full_text and not settled:
             try:
                 translated_text, detected_lang = await translate_text_free(full_text)
                 if detected_lang != "en" and detected_lang != "unknown":
@@ -1550,8 +2233,10 @@ async def on_message(message):
         if mod_mode == "strict":
             print(f"[STRICT MODE] Checking with AI")
             
-            has_slur_check, found_patterns = contains_slur(translated_text or full_text)
-            detected_context = found_patterns if has_slur_check else ["general content check"]
+            strict_hits = await find_slur_hits(translated_text or full_text)
+            found_patterns = matched_texts(strict_hits)
+            primary_hit = strongest_hit(strict_hits, detector.categories)
+            detected_context = found_patterns if found_patterns else ["general content check"]
             
             if found_patterns:
                 print(f"[STRICT] Pattern detected: {found_patterns[:3]}")
@@ -1593,7 +2278,11 @@ async def on_message(message):
                     pass
                 
                 reason = f"Strict: Severity {severity}/10"
-                await log_violation(message, reason, translated_text, severity_result)
+                await log_violation(
+                    message, reason, translated_text, severity_result,
+                    triggered_word=primary_hit.word if primary_hit else None,
+                    category=primary_hit.category if primary_hit else None
+                )
             else:
                 print(f"[STRICT] ✅ ALLOWED")
             
@@ -1601,13 +2290,15 @@ async def on_message(message):
         
         # CALM/RELAX MODE
         print(f"[{mod_mode.upper()} MODE] Checking patterns...")
-        has_slur_original, found_slurs_original = contains_slur(full_text)
-        has_slur_translated, found_slurs_translated = contains_slur(translated_text)
+        if hits is None:
+            hits = await find_slur_hits(full_text)
+        if translated_text != full_text:
+            hits += await find_slur_hits(translated_text, stop_at_first=early_exit)
         
-        has_slur = has_slur_original or has_slur_translated
-        all_found_slurs = list(set(found_slurs_original + found_slurs_translated))
+        all_found_slurs = matched_texts(hits)
+        primary_hit = strongest_hit(hits, detector.categories)
         
-        if not has_slur:
+        if not hits:
             print(f"[{mod_mode.upper()}] ✅ No patterns")
             return
         
@@ -1645,7 +2336,10 @@ async def on_message(message):
                 pass
             
             reason = f"Pattern: {', '.join(all_found_slurs[:5])}"
-            await log_violation(message, reason, translated_text, severity_result)
+            await log_violation(
+                message, reason, translated_text, severity_result,
+                triggered_word=primary_hit.word, category=primary_hit.category
+            )
             return
             
         # CALM MODE
@@ -1694,7 +2388,10 @@ async def on_message(message):
             print(f"[CALM] ✅ LOGGED ONLY")
         
         reason = f"Detected: {', '.join(all_found_slurs[:5])} - {severity}/10"
-        await log_violation(message, reason, translated_text, severity_result)
+        await log_violation(
+            message, reason, translated_text, severity_result,
+            triggered_word=primary_hit.word, category=primary_hit.category
+        )
             
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1720,3 +2417,10 @@ if __name__ == "__main__":
         start_self_ping()
     
     bot.run(TOKEN)
+    
+    if detector_pool is not None:
+        detector_pool.shutdown()
+    if translation_executor is not None:
+        translation_executor.shutdown(wait=False)
+    save_translation_cache()
+    save_verdict_cache()
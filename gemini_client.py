@@ -0,0 +1,399 @@
+"""
+HTTP plumbing for the Gemini REST API: one long-lived, pooled aiohttp session
+shared by every AI call, request timing for /status and benchmark.py, a
+scheduler choosing which API key each call uses, and hedged attempts.
+bot.py and benchmark.py both build their calls from these pieces.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import aiohttp
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+
+
+class RequestTimings:
+    """
+    aiohttp tracing that records, per request, the time spent opening a new
+    connection (DNS, TCP and TLS handshake) and the time of the whole request.
+    Requests on a reused keep-alive connection only count as reused.
+    Averages cover the last `samples` requests; the counters cover all of them.
+    """
+
+    def __init__(self, samples: int = 200):
+        self.connect_ms = deque(maxlen=samples)
+        self.request_ms = deque(maxlen=samples)
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_connection_create_start.append(self._on_connection_create_start)
+        self.trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        self.trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    async def _on_request_start(self, session, context, params):
+        context.request_start = session.loop.time()
+
+    async def _on_connection_create_start(self, session, context, params):
+        context.connect_start = session.loop.time()
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.opened += 1
+        self.connect_ms.append((session.loop.time() - context.connect_start) * 1000)
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.reused += 1
+
+    async def _on_request_end(self, session, context, params):
+        self.requests += 1
+        self.request_ms.append((session.loop.time() - context.request_start) * 1000)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.opened,
+            "connections_reused": self.reused,
+            "avg_connect_ms": round(sum(self.connect_ms) / len(self.connect_ms), 1) if self.connect_ms else 0,
+            "avg_request_ms": round(sum(self.request_ms) / len(self.request_ms), 1) if self.request_ms else 0,
+        }
+
+
+def create_session(max_connections: int = 8, timeout: float = 8,
+                   trace_configs: Optional[List[aiohttp.TraceConfig]] = None) -> aiohttp.ClientSession:
+    """
+    Session meant to live as long as the bot. Connections to the API are kept
+    alive and reused, so only the first request (or the first after an idle
+    minute) pays for the TCP and TLS handshake. At most max_connections are
+    open at once, and DNS answers are cached for 5 minutes.
+    Must be created, used and closed inside the same running event loop.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=max_connections,
+        ttl_dns_cache=300,
+        keepalive_timeout=60,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        trace_configs=trace_configs,
+    )
+
+
+# Gemini's "retryDelay": "31s" in a 429 error body
+RETRY_DELAY = re.compile(r'"retryDelay"\s*:\s*"(\d+(?:\.\d+)?)s"')
+
+
+def retry_after_seconds(headers: Dict[str, str], body: str) -> Optional[float]:
+    """How long a 429 response asks the client to wait: Retry-After header or Gemini's retryDelay"""
+    value = headers.get("Retry-After")
+    if value and value.strip().isdigit():
+        return float(value)
+    match = RETRY_DELAY.search(body)
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """capacity tokens, refilled continuously at capacity per period seconds"""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        if self.refill(now) < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def drain(self, now: float) -> None:
+        self.refill(now)
+        self.tokens = 0
+
+
+class KeyState:
+    """Budgets (None = unlimited) and health of one API key"""
+
+    def __init__(self, rpm: int, rpd: int, minute: float = 60):
+        self.minute = TokenBucket(rpm, minute) if rpm > 0 else None
+        self.day = TokenBucket(rpd, 86400) if rpd > 0 else None
+        self.cooldown_until = 0.0
+        # Rate limits / failures in a row, for growing the cooldown
+        self.streak = 0
+        # Moving averages over recent calls
+        self.error_rate = 0.0
+        self.latency_ms = 0.0
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+
+class KeyScheduler:
+    """
+    Chooses which API key each Gemini call uses, instead of trying keys in a
+    fixed order. With rpm / rpd set, every key has a per-minute and a per-day
+    token bucket (e.g. the free tier's RPM and RPD); 0 means no local budget,
+    leaving it to Google's 429s. A 429 puts the key in a cooldown for as long
+    as the response asks, or 10 s doubling per 429 in a row (at most 5 min).
+    Three failures in a row (timeouts, errors) also cool it down.
+    order() lists the keys not cooling down, healthiest first; keys past their
+    local budget come last, since the budget is only our estimate of Google's.
+    Keys are tracked by value, so adding or removing keys keeps the others' state.
+    minute is the length of the rpm window in seconds (shortened by benchmark.py).
+    """
+
+    ALPHA = 0.2
+    BASE_COOLDOWN = 10
+    MAX_COOLDOWN = 300
+    FAILURES_BEFORE_COOLDOWN = 3
+
+    def __init__(self, rpm: int = 0, rpd: int = 0, minute: float = 60):
+        self.rpm = max(0, rpm)
+        self.rpd = max(0, rpd)
+        self.minute = minute
+        self.states: Dict[str, KeyState] = {}
+
+    def state(self, key: str) -> KeyState:
+        if key not in self.states:
+            self.states[key] = KeyState(self.rpm, self.rpd, self.minute)
+        return self.states[key]
+
+    def cooling(self, key: str, now: float) -> bool:
+        return self.state(key).cooldown_until > now
+
+    def within_budget(self, key: str, now: float) -> bool:
+        state = self.state(key)
+        return all(bucket is None or bucket.refill(now) >= 1 for bucket in (state.minute, state.day))
+
+    def available(self, key: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return not self.cooling(key, now) and self.within_budget(key, now)
+
+    def score(self, key: str, now: float) -> tuple:
+        """Lower is healthier: within budget, few recent errors, most of the minute budget left, fast"""
+        state = self.state(key)
+        minute_left = state.minute.refill(now) / state.minute.capacity if state.minute else 1
+        return (not self.within_budget(key, now), round(state.error_rate, 1), -round(minute_left, 1), state.latency_ms)
+
+    def order(self, keys: List[str]) -> List[int]:
+        """Indices of the keys not cooling down, healthiest first"""
+        now = time.monotonic()
+        for key in list(self.states):
+            if key not in keys:
+                del self.states[key]
+        usable = [index for index, key in enumerate(keys) if not self.cooling(key, now)]
+        return sorted(usable, key=lambda index: self.score(keys[index], now))
+
+    def take(self, key: str) -> bool:
+        """Spend one request from the key's budgets (what is left of them); False if it is cooling down"""
+        now = time.monotonic()
+        state = self.state(key)
+        if self.cooling(key, now):
+            return False
+        for bucket in (state.minute, state.day):
+            if bucket is not None:
+                bucket.take(now)
+        state.requests += 1
+        return True
+
+    def success(self, key: str, latency_ms: float) -> None:
+        state = self.state(key)
+        state.successes += 1
+        state.streak = 0
+        state.error_rate *= 1 - self.ALPHA
+        state.latency_ms = latency_ms if state.successes == 1 else state.latency_ms + self.ALPHA * (latency_ms - state.latency_ms)
+
+    def throttled(self, key: str, retry_after: Optional[float] = None) -> None:
+        """The key got a 429: its minute budget is used up whatever our count says"""
+        now = time.monotonic()
+        state = self.state(key)
+        state.rate_limited += 1
+        state.streak += 1
+        if state.minute is not None:
+            state.minute.drain(now)
+        if retry_after is None:
+            retry_after = self.BASE_COOLDOWN * 2 ** (state.streak - 1)
+        state.cooldown_until = now + min(self.MAX_COOLDOWN, retry_after)
+
+    def failure(self, key: str) -> None:
+        state = self.state(key)
+        state.failures += 1
+        state.streak += 1
+        state.error_rate += self.ALPHA * (1 - state.error_rate)
+        if state.streak >= self.FAILURES_BEFORE_COOLDOWN:
+            cooldown = self.BASE_COOLDOWN * 2 ** (state.streak - self.FAILURES_BEFORE_COOLDOWN)
+            state.cooldown_until = time.monotonic() + min(self.MAX_COOLDOWN, cooldown)
+
+    def utilization(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Per key, in config order: budgets used (limit 0 = unlimited), cooldown, counts and averages"""
+        now = time.monotonic()
+        report = []
+        for key in keys:
+            state = self.state(key)
+            report.append({
+                "minute_used": round(state.minute.capacity - state.minute.refill(now)) if state.minute else 0,
+                "minute_limit": self.rpm,
+                "day_used": round(state.day.capacity - state.day.refill(now)) if state.day else 0,
+                "day_limit": self.rpd,
+                "cooldown_seconds": max(0, round(state.cooldown_until - now)),
+                "requests": state.requests,
+                "successes": state.successes,
+                "rate_limited": state.rate_limited,
+                "failures": state.failures,
+                "error_rate": state.error_rate,
+                "latency_ms": state.latency_ms,
+            })
+        return report
+
+
+class KeyResponse(NamedTuple):
+    # None when no response arrived (timeout, connection error)
+    status: Optional[int]
+    # Parsed JSON for a 200, the response text otherwise, or the error message
+    body: Any
+    latency_ms: float
+
+
+async def post_with_key(session: aiohttp.ClientSession, url: str, api_key: str, payload: Dict[str, Any],
+                        scheduler: Optional[KeyScheduler] = None) -> KeyResponse:
+    """
+    POST payload to url with one API key, and report the outcome to scheduler:
+    a success with its latency, a 429 with the wait it asks for, or a failure.
+    """
+    started = time.perf_counter()
+    try:
+        async with session.post(url, params={"key": api_key}, json=payload) as response:
+            status = response.status
+            headers = response.headers
+            body = await response.json(content_type=None) if status == 200 else await response.text()
+    except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+        if scheduler is not None:
+            scheduler.failure(api_key)
+        return KeyResponse(None, "Timeout" if isinstance(e, asyncio.TimeoutError) else str(e),
+                           (time.perf_counter() - started) * 1000)
+
+    latency_ms = (time.perf_counter() - started) * 1000
+    if scheduler is not None:
+        if status == 200:
+            scheduler.success(api_key, latency_ms)
+        elif status == 429:
+            scheduler.throttled(api_key, retry_after_seconds(headers, body))
+        else:
+            scheduler.failure(api_key)
+    return KeyResponse(status, body, latency_ms)
+
+
+def scheduled_attempts(scheduler: KeyScheduler, keys: List[str], attempt: Callable[[int], Awaitable[Any]],
+                       order: Optional[List[int]] = None) -> Iterator[Callable[[], Awaitable[Any]]]:
+    """
+    attempt(key index) for each key in scheduler order (or the given order),
+    for race(). A key's quota is taken only when its attempt actually starts.
+    """
+    for index in scheduler.order(keys) if order is None else order:
+        if scheduler.take(keys[index]):
+            yield lambda index=index: attempt(index)
+
+
+def hedge_delay(latencies: Sequence[float], percentile: float, fallback: float, min_samples: int = 20) -> float:
+    """
+    Seconds to wait before hedging: the percentile (clamped to 50-99) of
+    latencies in ms, or fallback seconds until there are min_samples of them.
+    """
+    if len(latencies) < min_samples:
+        return fallback
+    ordered = sorted(latencies)
+    return ordered[int(len(ordered) * min(99, max(50, percentile)) / 100)] / 1000
+
+
+class HedgeBudget:
+    """
+    Caps hedged requests at about ratio of all calls: every call earns ratio
+    of a token (holding at most burst), and a hedge spends a whole one.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 3):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def earn(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def available(self) -> bool:
+        return self.tokens >= 1
+
+    def spend(self) -> None:
+        self.tokens -= 1
+
+
+class RaceResult(NamedTuple):
+    result: Any
+    # Extra attempts started while an earlier one was still running
+    hedges: int
+    hedge_won: bool
+
+
+async def race(attempts: Iterable[Callable[[], Awaitable[Any]]], hedge_after: Optional[float] = None,
+               budget: Optional[HedgeBudget] = None) -> RaceResult:
+    """
+    Run attempts until one returns something other than None.
+    Attempts normally run one after another, the next starting when the
+    previous fails. With hedge_after (seconds), when the running attempts
+    haven't answered in that long, the next one also starts (a hedge), as long
+    as budget has a token. The first valid result wins; the rest are cancelled.
+    attempts is consumed lazily, so it can reserve resources (a key's quota)
+    only for attempts that actually start.
+    """
+    attempts = iter(attempts)
+    running: Dict[asyncio.Future, bool] = {}
+    hedges = 0
+
+    def start(hedge: bool) -> bool:
+        attempt = next(attempts, None)
+        if attempt is None:
+            return False
+        running[asyncio.ensure_future(attempt())] = hedge
+        return True
+
+    if budget is not None:
+        budget.earn()
+    exhausted = not start(False)
+    try:
+        while running:
+            can_hedge = hedge_after is not None and not exhausted and (budget is None or budget.available())
+            done, _ = await asyncio.wait(running, timeout=hedge_after if can_hedge else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if start(True):
+                    hedges += 1
+                    if budget is not None:
+                        budget.spend()
+                else:
+                    exhausted = True
+                continue
+            for task in done:
+                hedge = running.pop(task)
+                if not task.exception() and task.result() is not None:
+                    return RaceResult(task.result(), hedges, hedge)
+            if not running and not exhausted:
+                exhausted = not start(False)
+        return RaceResult(None, hedges, False)
+    finally:
+        for task in running:
+            task.cancel()
@@ -0,0 +1,173 @@
+"""
+Local language identification, used to skip translation for text that is
+already English. Character n-gram profiles (Cavnar & Trenkle), no network.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Most frequent words per language, most frequent first. Profiles are built
+# from these at import, so a language is added by adding a line here.
+COMMON_WORDS = {
+    "en": "the be to of and a in that have i it for not on with he as you do at this but his by from they we "
+          "say her she or an will my one all would there their what so up out if about who get which go me "
+          "when make can like time no just him know take people into year your good some could them see "
+          "other than then now look only come its over think also back after use two how our work first well "
+          "way even new want because any these give day most us is are was were has had been did does am "
+          "lol lmao im dont cant thats gonna yeah yes ok hey guys bro thanks please sorry really actually "
+          "anyone someone everyone game play stop why where here nice cool sure true same night morning love "
+          "thx ty np idk brb omg btw haha lmfao xd gg wp ez tbh nah nope yup bruh rip fr ya u ur k",
+    "es": "de la que el en y a los se del las un por con no una su para es al lo como más o pero sus le ha "
+          "me si sin sobre este ya entre cuando todo esta ser son dos también fue había era muy años hasta "
+          "desde está mi porque qué sólo han yo hay vez puede todos así nos ni parte tiene él uno donde bien "
+          "tiempo mismo ese ahora cada e vida otro después te otros aunque esa eso hace otra tan durante "
+          "siempre día tanto ella tres sí dijo sido gran país según menos mundo año antes estado eres tu "
+          "estas hola gracias vamos quiero tengo buenas buenos noches gusta",
+    "fr": "de la le et les des en un du une que est pour qui dans a par plus pas au sur ne se ce il sont "
+          "avec ou son aux à été elle nous vous je tu on mais ses y cette leur bien très sans même comme tout "
+          "fait aussi peut deux ont dont être était entre faire encore elles lui avoir ces notre où ils alors "
+          "tous après quoi moi toi ça oui non merci bonjour suis es sais",
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an werden "
+          "aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum war haben nur "
+          "oder aber vor zur bis mehr durch man sein wurde sei ich du wir ihr mich dich mir dir was wer wo ja "
+          "nein kein keine heute morgen gut sehr bist habe",
+    "pt": "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele das "
+          "tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre era "
+          "depois sem mesmo aos ter seus quem nas me esse eles estão você tinha foram essa num nem suas meu "
+          "às minha têm numa pelos elas havia seja qual será nós tenho lhe deles essas esses pelas este "
+          "fosse dele tu te vocês obrigado tudo bem",
+    "it": "di e il la che a per in un è non una sono del con si da le i mi ma come ho al lo io ti se gli "
+          "della ci più questo anche ha cosa tu bene sei nel alla solo fatto quando perché mio qui molto hai "
+          "dei chi tutto questa lei lui noi voi loro grazie ciao allora ancora sempre niente proprio sta "
+          "andiamo",
+    "nl": "de en van ik te dat die in een hij het niet zijn is was op aan met als voor had er maar om hem "
+          "dan zou of wat mijn men dit zo door over ze zich bij ook tot je mij uit der daar haar naar heb "
+          "hoe heeft hebben deze u want nog zal me zij nu geen omdat iets worden toch al waren veel meer "
+          "doen toen moet ben zonder kan hun dus alles onder ja eens hier wie werd altijd wordt jij weet",
+    "tr": "bir ve bu da de için ne çok ben sen o biz siz onlar ile gibi daha ama kadar değil var yok mi mı "
+          "mu mü ki en her şey olarak olan sonra şimdi neden nasıl nerede bugün yarın evet hayır teşekkür "
+          "merhaba iyi güzel kötü sadece bile hiç böyle şu benim senin onun",
+    "id": "yang dan di itu dengan untuk tidak ini dari dalam akan pada juga saya ke karena tersebut bisa "
+          "ada mereka lebih sudah atau kita kami kamu apa sangat hanya oleh sebagai bahwa telah belum jadi "
+          "lagi mau aku dia tapi kalau sama banyak baru harus masih bagaimana siapa terima kasih",
+    "pl": "i w nie na się z do to że a o jak ale po co tak za od jest jego jej już tylko przez jeszcze może "
+          "być czy ten był mnie też dla jestem jesteś ja ty my wy oni bardzo gdzie kiedy dlaczego teraz "
+          "dzisiaj jutro dobrze wiem robić",
+    "tl": "ang ng sa na at mga ay ko mo ka siya ako ikaw kami tayo sila hindi oo may wala ito iyan iyon "
+          "para kung pero lang din rin naman talaga po ba kasi dahil saan kailan bakit paano ano sino salamat",
+    "sv": "och i att det som en på är av för med till den har de inte om ett han men var jag sig från vi så "
+          "kan man när år säga hon under också efter eller nu sin där vid mot ska skulle kommer ut får "
+          "finns vara hade alla andra mycket än här då sedan över bara in blir upp även vad få två vill ha "
+          "många hur mer du dig mig vet",
+}
+
+# Ranked n-grams kept per profile, and the rank charged for an n-gram a profile lacks
+PROFILE_SIZE = 300
+
+# Below this many letters, or when the runner-up profile is less than MIN_MARGIN
+# (relative distance) behind the best one, the profiles are too close to call:
+# "ok" reads as Turkish and "good night" as Polish
+MIN_LETTERS = 20
+MIN_MARGIN = 0.1
+
+# Short ASCII text without a listed word is taken as English when the English
+# profile is within this much of the best one ("awesome stream" yes, "putain" no)
+ENGLISH_SLACK = 0.05
+
+# Letters only: digits and underscores are leetspeak or noise, not language
+LETTER_RUN = re.compile(r'[^\W\d_]+')
+
+
+def ngrams(text: str) -> List[str]:
+    """1- to 3-grams of every letter run, padded with spaces so word edges count."""
+    found = []
+    for word in LETTER_RUN.findall(text.lower()):
+        padded = f' {word} '
+        for size in (1, 2, 3):
+            found.extend(padded[i:i + size] for i in range(len(padded) - size + 1))
+    return found
+
+
+def is_latin(char: str) -> bool:
+    """Basic Latin through Latin Extended-B, plus Latin Extended Additional (Vietnamese etc.)."""
+    return char < 'ɐ' or 'Ḁ' <= char <= 'ỿ'
+
+
+class LanguageDetector:
+    """
+    Picks the closest language profile by the out-of-place measure: the text's
+    own n-grams are ranked by frequency and compared with each profile's ranks.
+    Text written mostly in a non-Latin script is reported as "other" without a
+    lookup. Only languages in COMMON_WORDS can be told apart; the detector's
+    job is deciding whether text is English, not naming every language.
+    Short chat is decided by its words instead (see _vote_words).
+    """
+
+    def __init__(self, common_words: Optional[Dict[str, str]] = None):
+        self.profiles: Dict[str, Dict[str, int]] = {}
+        # word -> languages listing it among their common words
+        self.word_languages: Dict[str, List[str]] = {}
+        for language, words in (common_words or COMMON_WORDS).items():
+            counts = Counter()
+            for rank, word in enumerate(words.split(), 1):
+                self.word_languages.setdefault(word, []).append(language)
+                for gram in ngrams(word):
+                    counts[gram] += 1 / rank ** 0.5
+            self.profiles[language] = {gram: rank for rank, (gram, _) in enumerate(counts.most_common(PROFILE_SIZE))}
+
+    def detect(self, text: str) -> Optional[str]:
+        """
+        Return the closest language code, "other" for mostly non-Latin text,
+        "unknown" when short text can't be placed, or None when the text has
+        no letters at all.
+        """
+        return self.identify(text)[0]
+
+    def identify(self, text: str) -> Tuple[Optional[str], bool]:
+        """
+        Same as detect(), plus whether the language profiles decided it clearly
+        (enough letters and margin), e.g. enough to tell a translator the source.
+        """
+        letters = [char for char in text if char.isalpha()]
+        if not letters:
+            return None, False
+        if sum(1 for char in letters if not is_latin(char)) * 2 > len(letters):
+            return "other", False
+
+        ranked = [gram for gram, _ in Counter(ngrams(text)).most_common(PROFILE_SIZE)]
+        if not ranked:
+            return None, False
+
+        distances = {}
+        for language, profile in self.profiles.items():
+            distance = 0
+            for rank, gram in enumerate(ranked):
+                profile_rank = profile.get(gram)
+                distance += PROFILE_SIZE if profile_rank is None else abs(profile_rank - rank)
+            distances[language] = distance
+
+        best, runner_up = sorted(distances, key=distances.get)[:2]
+        margin = (distances[runner_up] - distances[best]) / max(1, distances[best])
+        if len(letters) >= MIN_LETTERS and margin >= MIN_MARGIN:
+            return best, True
+        return self._vote_words(text, letters, distances), False
+
+    def _vote_words(self, text: str, letters: List[str], distances: Dict[str, int]) -> str:
+        """
+        Too little text for the profiles: count the common words of each
+        language instead, ties going to the closer profile. Plain ASCII with no
+        listed word is English only if the English profile is about as close as
+        the best one; anything else is "unknown" and gets translated.
+        """
+        votes = Counter()
+        for word in LETTER_RUN.findall(text.lower()):
+            votes.update(self.word_languages.get(word, ()))
+
+        top = max(votes.values(), default=0)
+        if not top:
+            closest = min(distances.values())
+            if all(char.isascii() for char in letters) and distances["en"] - closest <= ENGLISH_SLACK * max(1, closest):
+                return "en"
+            return "unknown"
+        return min((language for language, count in votes.items() if count == top), key=distances.get)
@@ -1,6 +1,636 @@
 # pattern_detector.py - Advanced Pattern Matching Engine
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
 import re
-from typing import List, Tuple
+import sys
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+ENGINES = ("regex", "automaton")
+
+# Code point ranges scanned for NFKD-foldable characters and combining marks
+FOLD_RANGES = [
+    (0x0080, 0x3000),    # Latin-1 through CJK symbols (accents, combining marks, letterlike)
+    (0xFB00, 0xFB07),    # Latin ligatures
+    (0xFE20, 0xFE30),    # Combining half marks
+    (0xFF01, 0xFF5F),    # Fullwidth ASCII
+    (0x1D400, 0x1D800),  # Mathematical alphanumerics
+]
+
+ZERO_WIDTH_CHARS = '\u00ad\u180e\u200b\u200c\u200d\u2060\ufeff'
+
+# Variants listed under more than one letter fold to the letter they look like
+CONFUSABLE_PREFERENCES = {'у': 'y', 'х': 'x'}
+
+SEPARATOR_JOIN = re.compile(r'([a-z])[\s._-]+([a-z])')
+SEGMENT_SPLIT = re.compile(r'\W+')
+SEPARATOR_RUN = re.compile(r'[\s._-]+')
+WORD_TOKEN = re.compile(r'\w+')
+
+# Plural and possessive endings allowed between a word and its closing boundary
+SUFFIXES = ("s", "'s", "es")
+
+
+# Shortest word the fuzzy tier will match at each edit distance; one or two
+# edits turn most shorter words into everyday ones
+FUZZY_MIN_LENGTH = {1: 5, 2: 8}
+
+# Joins a batch of texts for one lower/translate/sub call; no fold or separator rule touches it
+BATCH_DELIMITER = '\x00'
+
+# Category priorities from slur_patterns.json, most severe first
+PRIORITIES = ("critical", "high", "medium", "low")
+
+
+class Hit(NamedTuple):
+    """
+    One detector match. start/end index into the text the variant was found in:
+    'pattern' and 'substring' hits into the lowercased text, 'normalized' hits
+    into normalize_text(), 'skeleton' hits into the normalized text with separators removed,
+    'fuzzy' hits into skeleton().
+    """
+    word: str
+    category: str
+    priority: Optional[str]
+    start: int
+    end: int
+    text: str
+    variant: str
+
+
+class ScanResult(NamedTuple):
+    """Result for one text of a check_many() batch; index is its position in the input."""
+    index: int
+    text: str
+    hits: List[Hit]
+
+    @property
+    def matches(self) -> List[str]:
+        return list(dict.fromkeys(hit.text for hit in self.hits))
+
+
+def strongest_hit(hits: List[Hit], categories: Optional[Dict[str, dict]] = None) -> Optional[Hit]:
+    """
+    Return the first hit with the most severe priority, or None.
+    With categories (as given to set_categories), a hit of a category with
+    mod_alert wins over other hits of the same priority.
+    """
+    if not hits:
+        return None
+    categories = categories or {}
+    return min(hits, key=lambda hit: (
+        PRIORITIES.index(hit.priority) if hit.priority in PRIORITIES else len(PRIORITIES),
+        not categories.get(hit.category, {}).get("mod_alert", False),
+    ))
+
+
+class ScanTimeout(Exception):
+    """Raised by PatternAutomaton.scan when the deadline passes; carries the hits found so far."""
+
+    def __init__(self, hits: List[Tuple[int, int, int]]):
+        super().__init__("scan time budget exceeded")
+        self.hits = hits
+
+
+def is_separator(char: str) -> bool:
+    """Same characters as the [\\s._-] class used between pattern letters."""
+    return char.isspace() or char in '._-'
+
+
+def is_word_char(char: str) -> bool:
+    """Same characters as regex \\w (the inverse of the \\W word boundaries)."""
+    return char.isalnum() or char == '_'
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions and
+    adjacent transpositions), or limit + 1 once it is known to exceed limit.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+def deletions(word: str, distance: int) -> set:
+    """Every string reachable from word by deleting up to distance characters, word included."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        found |= frontier
+    return found
+
+
+def ends_with_suffix(text: str, position: int,
+                     char_symbols: Optional[Dict[str, Tuple[str, ...]]] = None) -> bool:
+    """
+    True when a suffix from SUFFIXES starts at position and is followed by a boundary.
+    Like the word itself, suffix letters may be disguised (matched through
+    char_symbols) and split by separators.
+    """
+    char_symbols = char_symbols or {}
+    length = len(text)
+    for suffix in SUFFIXES:
+        end = position
+        for letter in suffix:
+            while end < length and is_separator(text[end]):
+                end += 1
+            if end == length or letter not in char_symbols.get(text[end], (text[end],)):
+                break
+            end += 1
+        else:
+            if end == length or not is_word_char(text[end]):
+                return True
+    return False
+
+
+class PatternAutomaton:
+    """
+    Single-pass matcher over every base word at once.
+    Words are stored in a trie whose edges are substitution keys ('a', 's', ...) or
+    literal characters; the text is walked once with all partial matches in flight,
+    so cost depends on message length rather than on the number of words.
+    Mirrors create_pattern(): letters match their substitution class, separators may
+    appear between letters, and a hit must sit between word boundaries (optionally
+    followed by a plural/possessive suffix).
+    """
+
+    def __init__(self, words: Iterable[str], substitutions: Dict[str, List[str]],
+                 fold_table: Optional[Dict[int, Optional[str]]] = None):
+        self.words: List[str] = []
+        self.children: List[Dict[str, int]] = [{}]
+        self.outputs: List[List[int]] = [[]]
+        # With a fold table the automaton matches folded skeletons (see normalize_text)
+        self.fold_table = fold_table
+
+        self.keys = set(substitutions)
+        symbols: Dict[str, set] = {}
+        for key, variants in substitutions.items():
+            for char in ''.join(variants).lower():
+                if fold_table is not None and char.translate(fold_table) != char:
+                    continue
+                symbols.setdefault(char, set()).add(key)
+        self.char_symbols: Dict[str, Tuple[str, ...]] = {}
+        for char, keys in symbols.items():
+            if char not in self.keys:
+                keys.add(char)
+            self.char_symbols[char] = tuple(sorted(keys))
+
+        seen = set()
+        for word in words:
+            if word in seen:
+                continue
+            seen.add(word)
+            self.add_word(word)
+
+    def add_word(self, word: str) -> None:
+        node = 0
+        skeleton = word.lower()
+        if self.fold_table is not None:
+            skeleton = skeleton.translate(self.fold_table)
+        for char in skeleton:
+            if char == ' ':
+                continue
+            child = self.children[node].get(char)
+            if child is None:
+                child = len(self.children)
+                self.children.append({})
+                self.outputs.append([])
+                self.children[node][char] = child
+            node = child
+
+        if node:
+            self.outputs[node].append(len(self.words))
+        self.words.append(word)
+
+    def scan(self, text: str, deadline: Optional[float] = None,
+             stop: Optional[Callable[[int, int, int], bool]] = None) -> List[Tuple[int, int, int]]:
+        """
+        Find every word in an already-lowercased text. Runs in linear time: each
+        character is looked at once, against at most one thread per trie node.
+        With stop, returns the hits so far as soon as stop(word_index, start, end)
+        is true for one of them.
+        Raises ScanTimeout once time.perf_counter() passes the deadline.
+        Returns: list of (word_index, start, end) sorted by word order, then position
+        """
+        children = self.children
+        outputs = self.outputs
+        char_symbols = self.char_symbols
+        length = len(text)
+
+        hits = []
+        active: Dict[int, int] = {}
+        at_boundary = True
+        stopped = False
+
+        for i, char in enumerate(text):
+            if deadline is not None and not i & 255 and time.perf_counter() > deadline:
+                hits.sort()
+                raise ScanTimeout(hits)
+            if at_boundary:
+                active.setdefault(0, i)
+            symbols = char_symbols.get(char, (char,))
+            separator = is_separator(char)
+            ends_word = i + 1 == length or not is_word_char(text[i + 1])
+
+            advanced: Dict[int, int] = {}
+            for node, start in active.items():
+                edges = children[node]
+                for symbol in symbols:
+                    child = edges.get(symbol)
+                    if child is None:
+                        continue
+                    if start < advanced.get(child, length):
+                        advanced[child] = start
+                    if outputs[child] and (ends_word or ends_with_suffix(text, i + 1, char_symbols)):
+                        for word_index in outputs[child]:
+                            hits.append((word_index, start, i + 1))
+                            if stop is not None and stop(word_index, start, i + 1):
+                                stopped = True
+                if separator and node and start < advanced.get(node, length):
+                    advanced[node] = start
+
+            if stopped:
+                break
+            active = advanced
+            at_boundary = not is_word_char(char)
+
+        hits.sort()
+        return hits
+
+
+class PatternPrefilter:
+    """
+    Cheap necessary-condition check run before the full matcher.
+    Text is lowercased and projected onto a coarse alphabet in one translate pass:
+    letters that share a substitution variant or a fold ('1' -> i/l, 'v' -> u/v/w)
+    collapse to one symbol, and separators and non-word characters become segment
+    breaks. Any hit of either matcher pass is a run of whole consecutive segments
+    whose concatenation equals a projected word, so texts with no such run are
+    rejected without running the matcher.
+    hits counts texts passed on to the matcher, misses counts texts rejected.
+    """
+
+    def __init__(self, words: Iterable[str], substitutions: Dict[str, List[str]],
+                 fold_table: Dict[int, Optional[str]]):
+        parent: Dict[str, str] = {}
+
+        def find(char: str) -> str:
+            while parent.setdefault(char, char) != char:
+                parent[char] = parent[parent[char]]
+                char = parent[char]
+            return char
+
+        def union(first: str, second: str) -> None:
+            first, second = find(first), find(second)
+            if first != second:
+                parent[max(first, second)] = min(first, second)
+
+        class_chars = set()
+        for letter, variants in substitutions.items():
+            for char in ''.join(variants).lower():
+                class_chars.add(char)
+                union(char, letter)
+        for code, folded in fold_table.items():
+            if folded is not None and len(folded) == 1:
+                union(chr(code), folded)
+
+        # Class characters that folding deletes (combining marks) can't be projected
+        # consistently for both passes, so texts containing them always go through
+        self.passthrough = frozenset(c for c in class_chars if fold_table.get(ord(c), c) is None)
+
+        groups: Dict[str, List[str]] = {}
+        for char in parent:
+            groups.setdefault(find(char), []).append(char)
+        symbol = {}
+        for members in groups.values():
+            letters = [c for c in members if c in substitutions]
+            representative = min(letters or members)
+            for char in members:
+                symbol[char] = representative
+
+        table: Dict[int, str] = {}
+        for code in set(map(ord, symbol)) | set(fold_table):
+            char = chr(code)
+            folded = fold_table.get(code, char)
+            if is_separator(char) or folded is None:
+                table[code] = ' '
+                continue
+            projected = ''.join(symbol.get(c, c) for c in folded)
+            table[code] = projected if is_word_char(char) else f' {projected} '
+        for char in '._-':
+            table[ord(char)] = ' '
+        self.table = table
+
+        self.words = set()
+        self.prefixes = set()
+        for word in words:
+            projected = self.project(word.lower())
+            if not projected:
+                continue
+            for form in (word,) + tuple(word + suffix for suffix in SUFFIXES):
+                projected = self.project(form.lower())
+                self.words.add(projected)
+                self.prefixes.update(projected[:i] for i in range(1, len(projected) + 1))
+        self.max_length = max(map(len, self.words), default=0)
+
+        self.hits = 0
+        self.misses = 0
+
+    def project(self, text: str) -> str:
+        return ''.join(SEGMENT_SPLIT.split(text.translate(self.table)))
+
+    def might_match(self, text: str) -> bool:
+        """
+        Return False only when no matcher pass can find a word in the text.
+        """
+        return self.might_match_lowered(text.lower())
+
+    def might_match_lowered(self, lowered: str) -> bool:
+        if not self.passthrough.isdisjoint(lowered):
+            self.hits += 1
+            return True
+
+        segments = [s for s in SEGMENT_SPLIT.split(lowered.translate(self.table)) if s]
+        words = self.words
+        prefixes = self.prefixes
+        max_length = self.max_length
+        count = len(segments)
+
+        for i in range(count):
+            candidate = segments[i]
+            j = i + 1
+            while candidate in prefixes:
+                if candidate in words:
+                    self.hits += 1
+                    return True
+                if j == count or len(candidate) >= max_length:
+                    break
+                candidate += segments[j]
+                j += 1
+
+        self.misses += 1
+        return False
+
+
+class SubstringIndex:
+    """
+    Literal lookup of base words anywhere in lowercased text, with no boundaries
+    (so plural and possessive forms are covered too). Backed by one trie-shaped
+    regex so texts without any word start are rejected in C.
+    An optional key function (e.g. skeleton) transforms words before indexing;
+    hits still report the original word. Phrases are indexed with and without
+    their spaces, matching how the pattern passes treat them.
+    """
+
+    def __init__(self, words: Iterable[str], key: Optional[Callable[[str], str]] = None):
+        self.trie: Dict[str, dict] = {}
+        self.max_length = 0
+        for word in words:
+            indexed = key(word) if key else word.lower()
+            for form in dict.fromkeys((indexed, indexed.replace(' ', ''))):
+                if not form:
+                    continue
+                node = self.trie
+                for char in form:
+                    node = node.setdefault(char, {})
+                node.setdefault('', word)
+                self.max_length = max(self.max_length, len(form))
+
+        self.regex = re.compile(f'(?=(?:{self._trie_pattern(self.trie)}))') if self.trie else None
+
+    def _trie_pattern(self, node: Dict[str, dict]) -> str:
+        # Any word starting at a position is enough for the regex, so stop at the first terminal
+        alternatives = [
+            re.escape(char) + ('' if '' in child else self._trie_pattern(child))
+            for char, child in node.items() if char
+        ]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Return (word, start, end) for every occurrence in the text, by position.
+        """
+        if self.regex is None:
+            return []
+
+        found = []
+        for match in self.regex.finditer(text):
+            start = match.start()
+            node = self.trie
+            for offset, char in enumerate(text[start:start + self.max_length], 1):
+                node = node.get(char)
+                if node is None:
+                    break
+                word = node.get('')
+                if word is not None:
+                    found.append((word, start, start + offset))
+        return found
+
+
+class FuzzyIndex:
+    """
+    Approximate whole-token lookup for words opted into fuzzy matching,
+    SymSpell style: each word's skeleton is stored under every string reachable
+    by deleting up to its distance characters. A token within edit distance d
+    of a word shares at least one such deletion with it, so a lookup is a few
+    dict probes per token; candidates are confirmed with edit_distance().
+    Words shorter than FUZZY_MIN_LENGTH for their distance are left out.
+    """
+
+    def __init__(self, words: Dict[str, int], key: Callable[[str], str]):
+        self.deletes: Dict[str, set] = {}
+        self.entries: Dict[str, Tuple[str, int]] = {}
+        self.max_distance = 0
+        for word, distance in words.items():
+            skeleton = key(word)
+            distance = min(distance, max(FUZZY_MIN_LENGTH))
+            while distance and len(skeleton) < FUZZY_MIN_LENGTH[distance]:
+                distance -= 1
+            if not distance or skeleton in self.entries:
+                continue
+            self.entries[skeleton] = (word, distance)
+            self.max_distance = max(self.max_distance, distance)
+            for deleted in deletions(skeleton, distance):
+                self.deletes.setdefault(deleted, set()).add(skeleton)
+
+        self.min_length = min((len(s) - d for s, (_, d) in self.entries.items()), default=0)
+        self.max_length = max((len(s) + d for s, (_, d) in self.entries.items()), default=0)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def lookup(self, token: str) -> Optional[Tuple[str, int]]:
+        """Return (word, distance) of the closest word within its own distance, or None."""
+        if not self.min_length <= len(token) <= self.max_length:
+            return None
+
+        best = None
+        for deleted in deletions(token, self.max_distance):
+            for skeleton in self.deletes.get(deleted, ()):
+                word, allowed = self.entries[skeleton]
+                distance = edit_distance(token, skeleton, allowed)
+                if 0 < distance <= allowed and (best is None or distance < best[1]):
+                    best = (word, distance)
+        return best
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """Return (word, start, end) for every token of the text that is a near miss of a word."""
+        found = []
+        for match in WORD_TOKEN.finditer(text):
+            result = self.lookup(match.group())
+            if result:
+                found.append((result[0], match.start(), match.end()))
+        return found
+
+
+class ExceptionIndex:
+    """
+    Allowed words and phrases for one category (Scunthorpe-style): a hit is
+    dropped when the whole word around its span, folded to its skeleton, is an
+    allowed word (one set lookup), or when an allowed phrase covers the span.
+    """
+
+    def __init__(self, entries: Iterable[str], key: Callable[[str], str]):
+        self.key = key
+        self.words = set()
+        # First token of a phrase -> (phrase, offset of that token within the phrase)
+        self.phrases: Dict[str, List[Tuple[str, int]]] = {}
+        self.longest_phrase = 0
+        self.longest_offset = 0
+        for entry in entries:
+            entry = entry.strip().lower()
+            if not entry:
+                continue
+            if WORD_TOKEN.fullmatch(entry):
+                self.words.add(key(entry))
+                continue
+            # Phrases are matched as written and folded, since hits come from both kinds of text
+            for phrase in {entry, key(entry)}:
+                first = WORD_TOKEN.search(phrase)
+                if not first:
+                    continue
+                self.phrases.setdefault(first.group(), []).append((phrase, first.start()))
+                self.longest_phrase = max(self.longest_phrase, len(phrase))
+                self.longest_offset = max(self.longest_offset, first.start())
+
+    def __bool__(self) -> bool:
+        return bool(self.words or self.phrases)
+
+    def allows(self, source: str, start: int, end: int) -> bool:
+        token_start, token_end = start, end
+        while token_start > 0 and is_word_char(source[token_start - 1]):
+            token_start -= 1
+        while token_end < len(source) and is_word_char(source[token_end]):
+            token_end += 1
+        if self.key(source[token_start:token_end]) in self.words:
+            return True
+        if not self.phrases:
+            return False
+
+        # Only tokens that could open a phrase covering [start, end) are looked up
+        window = max(0, end - self.longest_phrase)
+        while window > 0 and is_word_char(source[window - 1]):
+            window -= 1
+        for match in WORD_TOKEN.finditer(source, window):
+            if match.start() > start + self.longest_offset:
+                break
+            for phrase, offset in self.phrases.get(match.group(), ()):
+                position = match.start() - offset
+                if (0 <= position <= start and position + len(phrase) >= end
+                        and source.startswith(phrase, position)):
+                    return True
+        return False
+
+
+class CompiledMatcher:
+    """
+    Everything compiled from one word list: per-word regexes, both automata,
+    the prefilter and the substring indexes. Built off to the side and swapped
+    into a PatternDetector in one assignment, so a scan never sees a half-built index.
+    substring_words (default: source) feed the substring indexes only.
+    """
+
+    def __init__(self, detector: "PatternDetector", source: Tuple[str, ...],
+                 previous: Optional["CompiledMatcher"] = None,
+                 substring_words: Optional[Tuple[str, ...]] = None):
+        started = time.perf_counter()
+        self.source = source
+        # Counts from compile_word_list() when built by build_word_list_matcher()
+        self.word_list_report: Optional[Dict[str, int]] = None
+        words = set(source)
+        old_words = set(previous.source) if previous else set()
+        self.added = len(words - old_words)
+        self.removed = len(old_words - words)
+
+        # Regexes are the expensive part, so unchanged words keep theirs.
+        # The automaton engine never runs them, so there they are compiled on first use only.
+        eager = detector.engine == "regex"
+        old_patterns = dict(previous.compiled_patterns) if previous else {}
+        old_skeletons = dict(previous.compiled_skeletons) if previous else {}
+        self.compiled_patterns: Dict[str, Pattern] = {}
+        self.compiled_skeletons: Dict[str, Pattern] = {}
+        self.recompiled = 0
+        self.reused = 0
+        for pattern in source:
+            if pattern in self.compiled_patterns:
+                continue
+            try:
+                if pattern in old_patterns and pattern in old_skeletons:
+                    self.compiled_patterns[pattern] = old_patterns[pattern]
+                    self.compiled_skeletons[pattern] = old_skeletons[pattern]
+                    self.reused += 1
+                    continue
+                if not eager:
+                    continue
+                self.compiled_patterns[pattern] = re.compile(detector.create_pattern(pattern), re.IGNORECASE)
+                self.compiled_skeletons[pattern] = re.compile(detector.create_pattern(pattern, skeleton=True), re.IGNORECASE)
+                self.recompiled += 1
+            except re.error as e:
+                print(f"Error compiling pattern '{pattern}': {e}")
+
+        # The tries take tens of milliseconds for the full list, so they are rebuilt whole
+        self.automaton = PatternAutomaton(source, detector.substitutions)
+        self.skeleton_automaton = PatternAutomaton(source, detector.substitutions, detector.fold_table)
+        self.prefilter = PatternPrefilter(source, detector.substitutions, detector.fold_table)
+        if previous:
+            self.prefilter.hits = previous.prefilter.hits
+            self.prefilter.misses = previous.prefilter.misses
+        substring_words = source if substring_words is None else substring_words
+        self.substring_index = SubstringIndex(substring_words)
+        self.skeleton_index = SubstringIndex(substring_words, detector.skeleton)
+
+        self.build_seconds = time.perf_counter() - started
+
+    def __getstate__(self) -> dict:
+        # Compiled regexes are recompiled when unpickled, so caching them saves nothing
+        state = self.__dict__.copy()
+        state["compiled_patterns"] = {}
+        state["compiled_skeletons"] = {}
+        return state
+
 
 class PatternDetector:
     """
@@ -8,7 +638,8 @@ class PatternDetector:
     Catches: leetspeak, spacing, unicode substitution, homoglyphs, number substitutions, etc.
     """
 
-    def __init__(self):
+    def __init__(self, engine: str = "regex"):
+        self.set_engine(engine)
         self.substitutions = {
             'a': ['a', '4', '@', 'α', 'а', 'A', 'ä', 'ȧ', 'ạ', 'ả', 'ầ', 'ấ', 'ậ', 'ẩ', 'ẫ', 'ā', 'ă', 'ą'],
             'e': ['e', '3', 'ε', 'е', 'E', 'è', 'é', 'ê', 'ẻ', 'ể', 'ệ', 'ę', 'ė', 'ē', 'ě', 'є'],
@@ -38,97 +669,801 @@ class PatternDetector:
             'v': ['v', 'V', 'ṽ', 'ṿ', 'ⅴ'],
         }
 
-        self.spacing_patterns = [
-            (r'\s+', ''),
-            (r'(\w)\s+(\w)', r'\1\2'),
-            (r'(\w)[._-]+(\w)', r'\1\2'),
-        ]
+        self.fold_table = self.build_fold_table()
+
+        # Compiled state for the current word list, replaced whole by install_matcher()
+        self.matcher: Optional[CompiledMatcher] = None
+
+        # word -> (category, priority), filled by set_categories()
+        self.categories: Dict[str, dict] = {}
+        self.word_categories: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.fuzzy_index = FuzzyIndex({}, self.skeleton)
+        self.exceptions: Dict[str, ExceptionIndex] = {}
+        self.exceptions_applied = 0
+        # Words whose hits settle a message on their own, see settles()
+        self.settling_words: set = set()
+        # (matcher, its settling words, its other words), see settling_split()
+        self._settling_split: Optional[Tuple[CompiledMatcher, Tuple[str, ...], Tuple[str, ...]]] = None
+
+        # Per-message CPU budget for pattern matching in seconds (None = unlimited)
+        self.time_budget: Optional[float] = None
+        self.budget_exceeded = 0
+        # Off sends every text to the matcher (benchmark.py checks the prefilter loses nothing)
+        self.use_prefilter = True
+
+    def set_engine(self, engine: str) -> None:
+        """
+        Select the matching engine used by check_text: 'regex' or 'automaton'.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        self.engine = engine
+
+    def set_categories(self, categories: Dict[str, dict]) -> int:
+        """
+        Index every word of every category so hits carry category and priority.
+        A word listed in several categories keeps the first one; spacing doesn't
+        count, since "w op" and "wop" match the same texts.
+        Categories with "fuzzy_distance": 1 or 2 also get near-miss (typo) matching,
+        and their "exceptions" (allowed words and phrases) suppress hits inside them.
+        Returns: number of indexed words
+        """
+        word_categories = {}
+        first_listed = {}
+        fuzzy_words = {}
+        exceptions = {}
+        for category, data in categories.items():
+            index = ExceptionIndex(data.get("exceptions", []), self.skeleton)
+            if index:
+                exceptions[category] = index
+            distance = data.get("fuzzy_distance", 0)
+            for word in data.get("words", []):
+                if word in word_categories:
+                    continue
+                word_categories[word] = first_listed.setdefault(word.lower().replace(' ', ''), (category, data.get("priority")))
+                if distance:
+                    fuzzy_words[word] = distance
+
+        self.fuzzy_index = FuzzyIndex(fuzzy_words, self.skeleton)
+        self.exceptions = exceptions
+        self.categories = categories
+        self.word_categories = word_categories
+        self.settling_words = {
+            word for word, (category, priority) in word_categories.items()
+            if priority == PRIORITIES[0] and categories[category].get("mod_alert", False)
+        }
+        self._settling_split = None
+        return len(word_categories)
+
+    def settles(self, hit: Hit) -> bool:
+        """
+        True when a hit decides everything that happens to its message: it has the
+        top priority and its category raises a mod alert, so strongest_hit() picks a
+        hit of an alerting category whatever else the message contains.
+        """
+        return hit.word in self.settling_words
 
-    def create_pattern(self, base_word: str) -> str:
+    def settling_split(self, matcher: CompiledMatcher) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """The matcher's words split into (settling words, the rest), each in list order."""
+        cached = self._settling_split
+        if cached is None or cached[0] is not matcher:
+            settling_words = self.settling_words
+            cached = self._settling_split = (
+                matcher,
+                tuple(word for word in matcher.source if word in settling_words),
+                tuple(word for word in matcher.source if word not in settling_words),
+            )
+        return cached[1], cached[2]
+
+    def compile_word_list(self, word_lists: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+        """
+        Drop entries that can't change what the detector reports:
+        - duplicates: the same word again (anywhere; the first category wins anyway)
+        - spelling variants: same length as an earlier-kept word of the same category,
+          every character inside that word's class in both passes ("1s1s" under "isis")
+        - suffix forms: another word of the same category plus a plural/possessive
+          ending, which both engines match with the same disguises as the word ("retards" under "retard")
+        Spaces match any run of separators (or none), so "w op" is the same entry as "wop".
+        Words that merely contain another word are kept: "fuck" does not catch "f.u.c.k.e.r".
+        Substring matching has no classes or separators, so "j3w" is still its own
+        substring; build_word_list_matcher() indexes every entry there.
+        Returns: (pruned lists in the same order, counts per reason)
+        """
+        def spaceless(word: str) -> str:
+            return word.lower().replace(' ', '')
+
+        def covers(kept: str, word: str) -> bool:
+            if len(kept) != len(word):
+                return False
+            folded_word = self.skeleton(word)
+            if len(folded_word) != len(word):
+                return False
+            for kept_char, char, folded_char in zip(kept, word, folded_word):
+                if kept_char == char:
+                    continue
+                variants = self.substitutions.get(kept_char)
+                if not variants or char not in {v.lower() for v in variants}:
+                    return False
+                if folded_char != kept_char and folded_char not in {v.lower() for v in variants}:
+                    return False
+            return True
+
+        def is_suffix_form(key: str, bases: set) -> bool:
+            return any(key.endswith(suffix) and key[:-len(suffix)] in bases for suffix in SUFFIXES)
+
+        # Skeleton folding plus the ASCII digit/symbol variants ("1s1s" -> "isis"); a word and
+        # the variants it covers almost always share this key, so only those are compared
+        variant_letters = {}
+        for letter, variants in self.substitutions.items():
+            for variant in variants:
+                if len(variant) == 1 and variant.isascii() and not variant.isalpha():
+                    variant_letters.setdefault(variant, letter)
+        bucket_fold = str.maketrans(variant_letters)
+
+        report = {"entries": 0, "duplicates": 0, "spelling_variants": 0, "suffix_forms": 0}
+        seen = set()
+        pruned = {}
+        for category, words in word_lists.items():
+            kept: List[str] = []
+            kept_keys = set()
+            buckets: Dict[str, List[str]] = {}
+            for word in words:
+                report["entries"] += 1
+                key = spaceless(word)
+                if key in seen:
+                    report["duplicates"] += 1
+                    continue
+                if is_suffix_form(key, kept_keys):
+                    report["suffix_forms"] += 1
+                    continue
+                bucket = buckets.setdefault(self.skeleton(key).translate(bucket_fold), [])
+                if any(covers(other, key) for other in bucket):
+                    report["spelling_variants"] += 1
+                    continue
+                seen.add(key)
+                kept_keys.add(key)
+                bucket.append(key)
+                kept.append(word)
+            pruned[category] = kept
+
+        # A suffix form listed before its base word is only caught once the base is kept
+        for category, words in pruned.items():
+            keys = {spaceless(word) for word in words}
+            suffix_forms = [word for word in words if is_suffix_form(spaceless(word), keys)]
+            report["suffix_forms"] += len(suffix_forms)
+            pruned[category] = [word for word in words if word not in suffix_forms]
+
+        report["kept"] = sum(len(words) for words in pruned.values())
+        return pruned, report
+
+    def build_fold_table(self) -> Dict[int, Optional[str]]:
+        """
+        Precompute the str.translate table used by normalize_text.
+        Folds every substitution variant to its letter, strips accents (NFKD),
+        drops combining marks and zero-width characters. ASCII letters stay as they are.
+        """
+        table: Dict[int, Optional[str]] = {}
+
+        for letter, variants in self.substitutions.items():
+            for variant in variants:
+                variant = variant.lower()
+                if len(variant) != 1 or (variant.isascii() and variant.isalpha()):
+                    continue
+                table.setdefault(ord(variant), CONFUSABLE_PREFERENCES.get(variant, letter))
+
+        letters = dict(table)
+        for start, end in FOLD_RANGES:
+            for code in range(start, end):
+                if code in table:
+                    continue
+                char = chr(code)
+                if unicodedata.combining(char):
+                    table[code] = None
+                    continue
+                decomposed = unicodedata.normalize('NFKD', char)
+                base = ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+                if base != char and base.isascii() and base.isalnum():
+                    table[code] = base.translate(letters)
+
+        for char in ZERO_WIDTH_CHARS:
+            table[ord(char)] = None
+
+        return table
+
+    def skeleton(self, text: str) -> str:
+        """
+        Lowercase and fold text to its canonical skeleton in one translate pass.
+        """
+        return text.lower().translate(self.fold_table)
+
+    def create_pattern(self, base_word: str, skeleton: bool = False) -> str:
         """
         Creates a regex pattern that matches variations of a word.
         Catches leetspeak, spacing, unicode substitution, etc.
+        With skeleton=True the pattern targets folded text, so each character
+        class keeps only the variants that survive folding.
         """
-        pattern_parts = []
-
-        for char in base_word.lower():
-            if char in self.substitutions:
-                char_class = ''.join(self.substitutions[char])
-                pattern_parts.append(f'[{re.escape(char_class)}]')
-            elif char == ' ':
-                pattern_parts.append('[\\s._-]*')
+        word = self.skeleton(base_word) if skeleton else base_word.lower()
+        # A run of separators between two letters must split only one way, since
+        # stacked [\s._-]* classes backtrack polynomially on a long run. Spaces add
+        # nothing (letters are already joined by optional separators), and a listed
+        # separator ("half-breed") is required, after a run that leaves it out
+        pattern = ''
+        previous = None
+        for char in word:
+            if char.isspace():
+                continue
+            if is_separator(char):
+                others = ''.join(c for c in '._-' if c != char)
+                pattern += f'[\\s{re.escape(others)}]*{re.escape(char)}'
             else:
-                pattern_parts.append(re.escape(char))
-
-        pattern = '[\\s._-]*'.join(pattern_parts)
-        full_pattern = f'(?:^|\\W)({pattern})(?:$|\\W)'
+                if previous is not None:
+                    pattern += '[\\s._-]*'
+                pattern += self._char_pattern(char, skeleton)
+            previous = char
+        # Suffixes are disguised the same way as the word, so "fuckers" needs no entry of its own
+        suffixes = '|'.join(
+            ''.join('[\\s._-]*' + self._char_pattern(char, skeleton) for char in suffix)
+            for suffix in SUFFIXES
+        )
+        full_pattern = f'(?:^|\\W)({pattern})(?:{suffixes})?(?:$|\\W)'
 
         return full_pattern
 
-    def check_text(self, text: str, pattern_list: List[str]) -> Tuple[bool, List[str]]:
+    def _char_pattern(self, char: str, skeleton: bool = False) -> str:
+        if char in self.substitutions:
+            char_class = ''.join(self.substitutions[char])
+            if skeleton:
+                char_class = ''.join(
+                    c for c in dict.fromkeys(char_class.lower())
+                    if c.translate(self.fold_table) == c
+                )
+            return f'[{re.escape(char_class)}]'
+        return re.escape(char)
+
+    def compile_patterns(self, pattern_list: List[str]) -> int:
+        """
+        Compile every word in the list once so check_text can reuse the regexes.
+        The automaton engine never runs them, so there each one is compiled on
+        first use only (after a switch to the regex engine).
+        Returns: number of compiled patterns
+        """
+        matcher = self.install_matcher(self.build_matcher(pattern_list))
+        if self.engine != "regex":
+            return len(matcher.compiled_patterns)
+        return self.compile_regexes(matcher)
+
+    def compile_regexes(self, matcher: CompiledMatcher) -> int:
+        """
+        Compile every missing per-word regex of a matcher now instead of on first use.
+        Returns: number of compiled patterns
+        """
+        for pattern in matcher.source:
+            try:
+                self.get_regex(pattern, matcher=matcher)
+                self.get_regex(pattern, skeleton=True, matcher=matcher)
+            except re.error as e:
+                print(f"Error compiling pattern '{pattern}': {e}")
+        return len(matcher.compiled_patterns)
+
+    def build_matcher(self, pattern_list: List[str], substring_words: Optional[List[str]] = None) -> CompiledMatcher:
+        """
+        Compile a word list without touching the live matcher. Regexes of words
+        already in the live matcher are reused. Safe to call from a worker thread.
+        substring_words replace pattern_list in the substring indexes.
+        """
+        return CompiledMatcher(self, tuple(pattern_list), self.matcher,
+                               tuple(substring_words) if substring_words is not None else None)
+
+    def build_word_list_matcher(self, word_lists: Dict[str, List[str]]) -> CompiledMatcher:
+        """
+        Prune the per-category lists with compile_word_list() and build a matcher
+        from what is left. The substring indexes keep every entry, so pruning never
+        changes what substrings=True finds. The counts end up in matcher.word_list_report,
+        which is pickled with it, so a cached matcher skips the pruning too.
+        """
+        pruned, report = self.compile_word_list(word_lists)
+        every_word = list(dict.fromkeys(word for words in word_lists.values() for word in words))
+        matcher = self.build_matcher([word for words in pruned.values() for word in words], every_word)
+        matcher.word_list_report = report
+        return matcher
+
+    def cache_key(self, source: bytes) -> str:
+        """
+        Hash identifying a compiled matcher: the word file contents, the
+        substitution table, this module's code (so an update invalidates old caches),
+        and the Python and Unicode database versions the fold tables were built with.
+        """
+        digest = hashlib.sha256()
+        with open(__file__, 'rb') as f:
+            digest.update(f.read())
+        digest.update(f"{sys.version}|{unicodedata.unidata_version}".encode('utf-8'))
+        digest.update(json.dumps(self.substitutions, sort_keys=True).encode('utf-8'))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def save_matcher(self, path: str, key: str, matcher: Optional[CompiledMatcher] = None) -> None:
+        """Write a matcher to a cache file, tagged with its cache_key()."""
+        matcher = matcher or self.matcher
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump({"key": key, "matcher": matcher}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def load_matcher(self, path: str, key: str) -> Optional[CompiledMatcher]:
+        """
+        Read a matcher saved by save_matcher(). Regexes aren't pickled, so with the
+        regex engine they are compiled here, before the first message needs them.
+        Returns: the matcher, or None if the file is missing, unreadable or for another key
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable matcher cache: {e}")
+            return None
+
+        if not isinstance(cached, dict) or cached.get("key") != key:
+            return None
+
+        matcher = cached["matcher"]
+        matcher.prefilter.hits = 0
+        matcher.prefilter.misses = 0
+        if self.engine == "regex":
+            self.compile_regexes(matcher)
+        return matcher
+
+    def install_matcher(self, matcher: CompiledMatcher) -> CompiledMatcher:
+        """Swap in a matcher from build_matcher(). Scans already running finish on the old one."""
+        self.matcher = matcher
+        return matcher
+
+    def matcher_for(self, pattern_list: List[str]) -> CompiledMatcher:
+        """
+        Return the matcher for a word list, building it only when the list changes.
+        """
+        matcher = self.matcher
+        if matcher is None or tuple(pattern_list) != matcher.source:
+            matcher = self.install_matcher(self.build_matcher(pattern_list))
+        return matcher
+
+    def get_automaton(self, pattern_list: List[str], skeleton: bool = False) -> PatternAutomaton:
+        """
+        Return the automaton for a word list, rebuilding it only when the list changes.
+        With skeleton=True returns the automaton that runs on folded text.
+        """
+        matcher = self.matcher_for(pattern_list)
+        return matcher.skeleton_automaton if skeleton else matcher.automaton
+
+    def get_regex(self, pattern: str, skeleton: bool = False, matcher: Optional[CompiledMatcher] = None) -> Pattern:
+        """
+        Return the compiled regex for a word, compiling and caching it on first use.
+        """
+        matcher = matcher or self.matcher
+        cache = matcher.compiled_skeletons if skeleton else matcher.compiled_patterns
+        regex = cache.get(pattern)
+        if regex is None:
+            regex = re.compile(self.create_pattern(pattern, skeleton), re.IGNORECASE)
+            cache[pattern] = regex
+        return regex
+
+    def check_text(self, text: str, pattern_list: List[str], substrings: bool = False) -> Tuple[bool, List[str]]:
         """
         Check text against pattern list.
+        With substrings=True, base words found anywhere in the lowercased text
+        (no word boundaries) are added to the matches as well.
         Returns: (found, list_of_matches)
         """
+        found_matches = []
+        for hit in self.find_hits(text, pattern_list, substrings):
+            if hit.text not in found_matches:
+                found_matches.append(hit.text)
+
+        return len(found_matches) > 0, found_matches
+
+    def find_hits(self, text: str, pattern_list: List[str], substrings: bool = False,
+                  stop_at_first: bool = False) -> List[Hit]:
+        """
+        Same search as check_text, returning a Hit (base word, category, priority,
+        span, matched text, variant) for every match instead of matched strings.
+        With stop_at_first=True the scan ends at the first hit that settles() the
+        message, and the later passes and tiers are skipped; any other hit could
+        still change the logged category or the mod alert, so without one the scan
+        runs to the end. The regex engine tries the settling words first.
+        """
         if not text or not pattern_list:
-            return False, []
+            return []
 
+        # One snapshot for the whole scan, so a reload mid-scan can't mix word lists
+        matcher = self.matcher_for(pattern_list)
         text_lower = text.lower()
-        found_matches = []
+        hits = []
+
+        if not self.use_prefilter or matcher.prefilter.might_match_lowered(text_lower):
+            hits = self._match(text, text_lower, self._normalize_lowered(text_lower), matcher, stop_at_first)
+
+        settled = stop_at_first and any(self.settles(hit) for hit in hits)
+
+        if substrings and not settled:
+            hits.extend(self._substring_hits(text_lower, matcher))
+
+        if self.fuzzy_index and not settled:
+            hits.extend(self._fuzzy_hits(text_lower, hits))
 
-        for pattern in pattern_list:
+        return hits
+
+    def check_many(self, texts: Iterable[str], pattern_list: List[str], substrings: bool = False,
+                   chunk_size: int = 256) -> Iterator[ScanResult]:
+        """
+        Scan many texts against one snapshot of the matcher, yielding a ScanResult
+        per text in input order. Texts are taken chunk_size at a time; each chunk is
+        lowercased and normalized with one call over the joined texts. The prefilter
+        and matcher still run per text, so this saves little over a find_hits() loop.
+        """
+        matcher = self.matcher_for(pattern_list) if pattern_list else None
+        iterator = iter(texts)
+        index = 0
+
+        while True:
+            chunk = [text or "" for text in islice(iterator, chunk_size)]
+            if not chunk:
+                return
+
+            if matcher is None:
+                for text in chunk:
+                    yield ScanResult(index, text, [])
+                    index += 1
+                continue
+
+            joined = BATCH_DELIMITER.join(chunk)
+            if joined.count(BATCH_DELIMITER) == len(chunk) - 1:
+                lowered = joined.lower().split(BATCH_DELIMITER)
+            else:
+                lowered = [text.lower() for text in chunk]
+
+            prefilter = matcher.prefilter
+            fuzzy_index = self.fuzzy_index
+            use_prefilter = self.use_prefilter
+            candidates = [
+                i for i, text_lower in enumerate(lowered)
+                if text_lower and (not use_prefilter or prefilter.might_match_lowered(text_lower))
+            ]
+            normalized = {}
+            if candidates:
+                folded = self._normalize_lowered(BATCH_DELIMITER.join(lowered[i] for i in candidates))
+                parts = folded.split(BATCH_DELIMITER)
+                if len(parts) != len(candidates):
+                    parts = [self._normalize_lowered(lowered[i]) for i in candidates]
+                normalized = dict(zip(candidates, parts))
+
+            for offset, text in enumerate(chunk):
+                text_lower = lowered[offset]
+                hits = []
+                if offset in normalized:
+                    hits = self._match(text, text_lower, normalized[offset], matcher)
+                if substrings and text_lower:
+                    hits.extend(self._substring_hits(text_lower, matcher))
+                if fuzzy_index and text_lower:
+                    hits.extend(self._fuzzy_hits(text_lower, hits))
+                yield ScanResult(index, text, hits)
+                index += 1
+
+    def _match(self, text: str, text_lower: str, normalized: str, matcher: CompiledMatcher,
+               stop_at_first: bool = False) -> List[Hit]:
+        deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        if self.engine == "automaton":
+            return self._match_automaton(text, text_lower, normalized, matcher, deadline, stop_at_first)
+        if stop_at_first:
+            return self._match_regex_first(text, text_lower, normalized, matcher, deadline)
+        return self._match_regex(text, text_lower, normalized, matcher, deadline)
+
+    def _fuzzy_hits(self, text_lower: str, hits: List[Hit]) -> List[Hit]:
+        """
+        Near misses of fuzzy-enabled words among the folded text's tokens.
+        Separators are not joined here, so tokens stay whole words. Runs
+        regardless of the prefilter, which only admits exact spellings.
+        """
+        folded = text_lower.translate(self.fold_table)
+        found_words = {hit.word for hit in hits}
+        fuzzy_hits = []
+        for word, start, end in self.fuzzy_index.find(folded):
+            if word not in found_words:
+                self._add_hit(fuzzy_hits, word, start, end, folded, "fuzzy")
+        return fuzzy_hits
+
+    def _substring_hits(self, text_lower: str, matcher: CompiledMatcher) -> List[Hit]:
+        substring_hits = []
+        for word, start, end in matcher.substring_index.find(text_lower):
+            self._add_hit(substring_hits, word, start, end, text_lower, "substring")
+        return substring_hits
+
+    def _add_hit(self, hits: List[Hit], word: str, start: int, end: int, source: str, variant: str) -> None:
+        """Append a Hit unless the word it sits in is an exception for the word's category."""
+        if not self._allowed(word, start, end, source):
+            self.exceptions_applied += 1
+            return
+        category, priority = self.word_categories.get(word, ("unknown", None))
+        hits.append(Hit(word, category, priority, start, end, source[start:end], variant))
+
+    def _allowed(self, word: str, start: int, end: int, source: str) -> bool:
+        """False when the match sits inside an exception of the word's category."""
+        exceptions = self.exceptions.get(self.word_categories.get(word, ("unknown", None))[0])
+        return not (exceptions and exceptions.allows(source, start, end))
+
+    def _record_budget_exceeded(self, text: str, fallback: str) -> None:
+        self.budget_exceeded += 1
+        print(f"⚠️ Scan budget exceeded on a {len(text)}-char message - {fallback}")
+
+    def _match_regex(self, text: str, text_lower: str, normalized: str, matcher: CompiledMatcher,
+                     deadline: Optional[float] = None, words: Optional[Tuple[str, ...]] = None) -> List[Hit]:
+        """
+        Regex engine: every compiled pattern (or just those of words) over the raw
+        and normalized text. Backtracking makes its cost hard to bound, so once the
+        deadline passes the message is finished with the linear-time automaton instead.
+        """
+        hits = []
+        words = matcher.source if words is None else words
+
+        for pattern in words:
+            if deadline is not None and time.perf_counter() > deadline:
+                return self._finish_with_automaton(text, text_lower, normalized, matcher, hits)
             try:
-                regex = self.create_pattern(pattern)
-                matches = re.finditer(regex, text_lower, re.IGNORECASE)
+                matches = self.get_regex(pattern, matcher=matcher).finditer(text_lower)
 
                 for match in matches:
-                    matched_text = match.group(1)
-                    if matched_text and matched_text not in found_matches:
-                        found_matches.append(matched_text)
+                    if match.group(1):
+                        self._add_hit(hits, pattern, *match.span(1), text_lower, "pattern")
             except Exception as e:
                 print(f"Error checking pattern '{pattern}': {e}")
                 continue
 
-        normalized = self.normalize_text(text)
         if normalized != text_lower:
-            for pattern in pattern_list:
+            for pattern in words:
+                if deadline is not None and time.perf_counter() > deadline:
+                    return self._finish_with_automaton(text, text_lower, normalized, matcher, hits)
                 try:
-                    regex = self.create_pattern(pattern)
-                    matches = re.finditer(regex, normalized, re.IGNORECASE)
+                    matches = self.get_regex(pattern, skeleton=True, matcher=matcher).finditer(normalized)
 
                     for match in matches:
-                        matched_text = match.group(1)
-                        if matched_text and matched_text not in found_matches:
-                            found_matches.append(matched_text)
-                except Exception as e:
+                        if match.group(1):
+                            self._add_hit(hits, pattern, *match.span(1), normalized, "normalized")
+                except Exception:
                     continue
 
-        return len(found_matches) > 0, found_matches
+        return hits
+
+    def _match_regex_first(self, text: str, text_lower: str, normalized: str, matcher: CompiledMatcher,
+                           deadline: Optional[float] = None) -> List[Hit]:
+        """
+        Regex engine for stop_at_first: the settling words one at a time, over the
+        raw then the normalized text, returning at the first hit. Without one, the
+        other words are scanned as usual by _match_regex().
+        """
+        hits = []
+        settling, rest = self.settling_split(matcher)
+
+        for pattern in settling:
+            if deadline is not None and time.perf_counter() > deadline:
+                return self._finish_with_automaton(text, text_lower, normalized, matcher, hits, stop_at_first=True)
+            try:
+                passes = [(self.get_regex(pattern, matcher=matcher), text_lower, "pattern")]
+                if normalized != text_lower:
+                    passes.append((self.get_regex(pattern, skeleton=True, matcher=matcher), normalized, "normalized"))
+
+                for regex, candidate, variant in passes:
+                    for match in regex.finditer(candidate):
+                        if match.group(1):
+                            self._add_hit(hits, pattern, *match.span(1), candidate, variant)
+                            if hits:
+                                return hits
+            except Exception as e:
+                print(f"Error checking pattern '{pattern}': {e}")
+                continue
+
+        return self._match_regex(text, text_lower, normalized, matcher, deadline, rest)
+
+    def _finish_with_automaton(self, text: str, text_lower: str, normalized: str, matcher: CompiledMatcher,
+                               hits: List[Hit], stop_at_first: bool = False) -> List[Hit]:
+        self._record_budget_exceeded(text, "finished with automaton")
+        # The automaton rescans the text from the start, so it finds the regex hits again
+        seen = {(hit.word, hit.start, hit.end) for hit in hits}
+        return hits + [
+            hit for hit in self._match_automaton(text, text_lower, normalized, matcher, stop_at_first=stop_at_first)
+            if (hit.word, hit.start, hit.end) not in seen
+        ]
+
+    def _match_automaton(self, text: str, text_lower: str, normalized: str, matcher: CompiledMatcher,
+                         deadline: Optional[float] = None, stop_at_first: bool = False) -> List[Hit]:
+        """
+        Automaton engine: one pass over the raw and normalized text.
+        Once the deadline passes, scanning stops; the hits found so far are kept and
+        the whole normalized text, separators removed, goes through the skeleton
+        substring lookup (linear, in C) so padding a message can't hide a word.
+        With stop_at_first, scanning ends at the first hit that settles() the
+        message, and the normalized pass is skipped once the raw pass found one.
+        """
+        hits = []
+        settling_words = self.settling_words
+
+        passes = [(matcher.automaton, text_lower, "pattern")]
+        if normalized != text_lower:
+            passes.append((matcher.skeleton_automaton, normalized, "normalized"))
+
+        for automaton, candidate, variant in passes:
+            if stop_at_first and any(hit.word in settling_words for hit in hits):
+                break
+            stop = self._settling_stop(automaton, candidate) if stop_at_first and settling_words else None
+            timed_out = False
+            try:
+                found = automaton.scan(candidate, deadline, stop)
+            except ScanTimeout as timeout:
+                found = timeout.hits
+                timed_out = True
+
+            for word_index, start, end in found:
+                self._add_hit(hits, automaton.words[word_index], start, end, candidate, variant)
+
+            if timed_out:
+                self._record_budget_exceeded(text, "finished with skeleton lookup")
+                joined = SEPARATOR_RUN.sub('', normalized)
+                for word, start, end in matcher.skeleton_index.find(joined):
+                    self._add_hit(hits, word, start, end, joined, "skeleton")
+                break
+
+        return hits
+
+    def _settling_stop(self, automaton: PatternAutomaton, source: str) -> Callable[[int, int, int], bool]:
+        """Stop predicate for PatternAutomaton.scan: true for a hit that settles() the message."""
+        words = automaton.words
+        settling_words = self.settling_words
+
+        def stop(word_index: int, start: int, end: int) -> bool:
+            word = words[word_index]
+            return word in settling_words and self._allowed(word, start, end, source)
+
+        return stop
 
     def normalize_text(self, text: str) -> str:
         """
-        Normalize text by replacing common substitutions.
+        Normalize text to its folded skeleton (see build_fold_table) and join
+        letters split by separators.
         """
         if not text:
             return ""
 
-        normalized = text.lower()
-
-        replacements = {
-            '4': 'a', '@': 'a',
-            '3': 'e',
-            '1': 'i', '!': 'i', '|': 'i',
-            '0': 'o',
-            '5': 's', '$': 's',
-            '7': 't', '+': 't',
-            '8': 'b',
-            '9': 'g',
-            '2': 'z',
-        }
+        return self._normalize_lowered(text.lower())
+
+    def _normalize_lowered(self, text_lower: str) -> str:
+        return SEPARATOR_JOIN.sub(r'\1\2', text_lower.translate(self.fold_table))
+
+
+# Detector owned by each DetectorPool worker process, set up once by _init_worker
+_worker_detector: Optional[PatternDetector] = None
+
+
+def _init_worker(engine: str, time_budget: Optional[float], matcher_blob: bytes,
+                 categories: Dict[str, dict]) -> None:
+    global _worker_detector
+    detector = PatternDetector(engine)
+    detector.time_budget = time_budget
+    # Regexes aren't pickled; with the regex engine each one compiles on first use
+    matcher = detector.install_matcher(pickle.loads(matcher_blob))
+    # Counts are sent back per result (see _take_counters), so start from the parent's at 0
+    matcher.prefilter.hits = matcher.prefilter.misses = 0
+    detector.set_categories(categories)
+    _worker_detector = detector
+
+
+def _take_counters(detector: PatternDetector) -> Tuple[int, int, int, int]:
+    """The worker's stats counters since the last call (prefilter hits and misses, budget, exceptions), reset to 0."""
+    prefilter = detector.matcher.prefilter
+    counters = (prefilter.hits, prefilter.misses, detector.budget_exceeded, detector.exceptions_applied)
+    prefilter.hits = prefilter.misses = detector.budget_exceeded = detector.exceptions_applied = 0
+    return counters
+
+
+def _worker_find_hits(text: str, substrings: bool,
+                      stop_at_first: bool = False) -> Tuple[List[Hit], Tuple[int, int, int, int]]:
+    detector = _worker_detector
+    hits = detector.find_hits(text, detector.matcher.source, substrings, stop_at_first)
+    return hits, _take_counters(detector)
+
+
+def _worker_check_chunk(start: int, texts: List[str],
+                        substrings: bool) -> Tuple[List[ScanResult], Tuple[int, int, int, int]]:
+    detector = _worker_detector
+    results = [
+        result._replace(index=start + result.index)
+        for result in detector.check_many(texts, detector.matcher.source, substrings, chunk_size=len(texts))
+    ]
+    return results, _take_counters(detector)
+
+
+class DetectorPool:
+    """
+    Runs a PatternDetector's scans in worker processes so pattern matching
+    doesn't hold the caller's GIL. Each worker unpickles the detector's compiled
+    matcher once at startup; load() restarts the workers with a new one.
+    Workers are spawned rather than forked, since the bot process runs threads.
+    A spawned worker imports the caller's __main__ script (not as __main__), so
+    its startup must sit under an if __name__ == "__main__" guard. Stats counters
+    (prefilter, scan budget, exceptions) come back with each result and are added
+    to the detector's.
+    """
+
+    def __init__(self, detector: PatternDetector, workers: int):
+        self.detector = detector
+        self.workers = max(1, workers)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.load()
+
+    def load(self) -> None:
+        """(Re)start the workers with the detector's current matcher and categories."""
+        detector = self.detector
+        matcher_blob = pickle.dumps(detector.matcher, protocol=pickle.HIGHEST_PROTOCOL)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(detector.engine, detector.time_budget, matcher_blob, detector.categories),
+        )
+        old_executor, self.executor = self.executor, executor
+        if old_executor is not None:
+            # Scans already submitted finish on the old workers
+            old_executor.shutdown(wait=False)
+
+    def submit(self, text: str, substrings: bool = False, stop_at_first: bool = False) -> Future:
+        """Queue one find_hits() call; the future resolves to its list of Hits."""
+        result: Future = Future()
+
+        def finish(scan: Future) -> None:
+            if result.cancelled():
+                return
+            try:
+                hits, counters = scan.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            self._add_counters(counters)
+            result.set_result(hits)
+
+        self.executor.submit(_worker_find_hits, text, substrings, stop_at_first).add_done_callback(finish)
+        return result
+
+    def check_many(self, texts: Iterable[str], substrings: bool = False,
+                   chunk_size: int = 256) -> Iterator[ScanResult]:
+        """
+        Parallel check_many(): chunks are spread over the workers, with at most two
+        chunks per worker in flight, and results are yielded in input order.
+        """
+        iterator = iter(texts)
+        pending: deque = deque()
+        start = 0
 
-        for old, new in replacements.items():
-            normalized = normalized.replace(old, new)
+        while True:
+            while len(pending) < self.workers * 2:
+                chunk = [text or "" for text in islice(iterator, chunk_size)]
+                if not chunk:
+                    break
+                pending.append(self.executor.submit(_worker_check_chunk, start, chunk, substrings))
+                start += len(chunk)
+            if not pending:
+                return
+            results, counters = pending.popleft().result()
+            self._add_counters(counters)
+            yield from results
 
-        normalized = re.sub(r'([a-z])[\s._-]+([a-z])', r'\1\2', normalized)
+    def _add_counters(self, counters: Tuple[int, int, int, int]) -> None:
+        detector = self.detector
+        prefilter = detector.matcher.prefilter
+        prefilter.hits += counters[0]
+        prefilter.misses += counters[1]
+        detector.budget_exceeded += counters[2]
+        detector.exceptions_applied += counters[3]
 
-        return normalized
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -0,0 +1,134 @@
+"""
+Bounded in-memory cache for results of slow remote calls (translation, AI
+verdicts), with optional expiry and JSON persistence so a restart doesn't
+start cold.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def text_key(text: str, *context: str) -> str:
+    """
+    Cache key for a message: hash of the text with case and whitespace normalized.
+    context (e.g. a prompt version) is hashed along with it, so the same text
+    gets a different key in a different context.
+    """
+    normalized = ' '.join(text.casefold().split())
+    return hashlib.sha256('\x1f'.join((normalized,) + context).encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """
+    Least-recently-used cache holding at most max_entries values.
+    With ttl (seconds), an entry also expires that long after it was put().
+    Expiry uses wall-clock time so it carries over save()/load().
+    Values must be JSON-serializable for save()/load().
+    hits/misses count get() calls, evictions counts entries pushed out by size,
+    expired counts entries dropped for age.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: Optional[float] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Any]" = OrderedDict()
+        # Expiry time per key, for entries put while ttl was set
+        self.expires: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        # Set by put(), cleared by save(), so unchanged caches aren't rewritten
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.entries.get(key)
+        if value is not None and key in self.expires and self.expires[key] <= time.time():
+            self._remove(key)
+            self.expired += 1
+            self.dirty = True
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.ttl is not None:
+            self.expires[key] = time.time() + self.ttl
+        else:
+            self.expires.pop(key, None)
+        self.dirty = True
+        self._evict()
+
+    def resize(self, max_entries: int) -> None:
+        """Change the size limit, evicting the oldest entries if it shrank."""
+        self.max_entries = max(1, max_entries)
+        self._evict()
+
+    def _remove(self, key: str) -> None:
+        del self.entries[key]
+        self.expires.pop(key, None)
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.max_entries:
+            key, _ = self.entries.popitem(last=False)
+            self.expires.pop(key, None)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hit_rate": self.hits / lookups if lookups else 0,
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Write entries, oldest first, to path as [key, value] pairs, or
+        [key, value, expiry] for entries that expire. The file is replaced in one step.
+        """
+        items = [
+            [key, value, self.expires[key]] if key in self.expires else [key, value]
+            for key, value in self.entries.items()
+        ]
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(items, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self.dirty = False
+
+    def load(self, path: str) -> int:
+        """
+        Add the entries saved at path that haven't expired yet (keeping the most
+        recent if there are too many).
+        Returns: number of entries loaded
+        """
+        with open(path, 'r') as f:
+            items = json.load(f)
+        now = time.time()
+        items = [item for item in items if len(item) < 3 or item[2] > now][-self.max_entries:]
+        for item in items:
+            key, value = item[0], item[1]
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(item) >= 3:
+                self.expires[key] = item[2]
+        self._evict()
+        return len(items)